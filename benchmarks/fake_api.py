@@ -0,0 +1,195 @@
+"""
+Local fake of the Sofascore API that serves the JSON fixtures in benchmarks/fixtures, so the drivers
+can be run and measured without touching the real API.
+
+Every event, player and team ID gets the same fixture. Paths without a fixture get a 404, like
+the real API does for a player without statistics.
+
+Example:
+    server = FakeSofascoreAPI(latency=0.02)
+    server.start()
+    set_transport(HTTPTransport('127.0.0.1', server.port, https=False))
+    ...
+    server.stop()
+"""
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Path of the endpoint: fixture served for it
+ROUTES = {
+    r'/api/v1/event/\d+': 'event.json',
+    r'/api/v1/event/\d+/lineups': 'event_lineups.json',
+    r'/api/v1/event/\d+/average-positions': 'event_average_positions.json',
+    r'/api/v1/event/\d+/graph': 'event_graph.json',
+    r'/api/v1/event/\d+/shotmap': 'event_shotmap.json',
+    r'/api/v1/event/\d+/incidents': 'event_incidents.json',
+    r'/api/v1/event/\d+/statistics': 'event_statistics.json',
+    r'/api/v1/event/\d+/highlights': 'event_highlights.json',
+    r'/api/v1/player/\d+/unique-tournament/\d+/season/\d+/statistics/overall': 'player_statistics.json',
+    r'/api/v1/player/\d+/unique-tournament/\d+/season/\d+/heatmap/overall': 'player_heatmap.json',
+    r'/api/v1/player/\d+/statistics/seasons': 'player_seasons.json',
+    r'/api/v1/player/\d+/attribute-overviews': 'player_attributes.json',
+    r'/api/v1/team/\d+': 'team.json',
+    r'/api/v1/team/\d+/unique-tournament/\d+/season/\d+/statistics/overall': 'team_statistics.json',
+    r'/api/v1/unique-tournament/\d+/season/\d+/standings/total': 'standings.json',
+    r'/api/v1/unique-tournament/\d+/season/\d+/rounds': 'season_rounds.json',
+    r'/api/v1/unique-tournament/\d+/season/\d+/events/round/\d+(/slug/[\w-]+)?': 'round_events.json',
+}
+
+NOT_FOUND = json.dumps({'error': {'code': 404, 'message': 'Not Found'}}).encode('utf-8')
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """
+    Loads the fixtures of every route, already encoded so serving them costs nothing.
+
+    Args:
+        directory (str): Directory with the fixtures. Default is benchmarks/fixtures.
+
+    Returns:
+        list: (compiled pattern, body) tuples.
+    """
+    routes = []
+    for pattern, name in ROUTES.items():
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            data = json.load(f)
+        if name == 'player_seasons.json':
+            data = shift_season_years(data)
+        routes.append((re.compile(pattern + '$'), json.dumps(data, separators=(',', ':')).encode('utf-8')))
+    return routes
+
+
+def shift_season_years(data):
+    """
+    Moves the seasons of the player tournaments fixture so the latest one is the current year, since
+    get_player_tournaments only keeps the seasons of the last two years.
+    """
+    latest = max(int(season['year'][-2:]) for tournament in data['uniqueTournamentSeasons'] for season in tournament['seasons'])
+    shift = datetime.now().year % 100 - latest
+
+    for tournament in data['uniqueTournamentSeasons']:
+        for season in tournament['seasons']:
+            season['year'] = re.sub(r'\d{2}(?=\D|$)', lambda m: f'{(int(m.group()) + shift) % 100:02d}', season['year'])
+    return data
+
+
+class FakeSofascoreAPI:
+    """
+    Threaded HTTP/1.1 server with keep-alive, like the real API, serving the fixtures.
+
+    Args:
+        latency (float): Time in seconds each response is delayed, to mimic the network. Default is 0.
+        port (int): Port to listen on. Default is 0, any free port.
+        fixtures_dir (str): Directory with the fixtures. Default is benchmarks/fixtures.
+    """
+
+    def __init__(self, latency=0, port=0, fixtures_dir=FIXTURES_DIR):
+        self.latency = latency
+        self.routes = load_fixtures(fixtures_dir)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            wbufsize = -1  # Send the headers and the body in one write, avoiding delayed ACK stalls
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with api._lock:
+                    api.requests += 1
+                if api.latency:
+                    time.sleep(api.latency)
+
+                path = self.path.split('?')[0]
+                body = next((body for pattern, body in api.routes if pattern.match(path)), None)
+                status = 200 if body is not None else 404
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body or NOT_FOUND)))
+                self.end_headers()
+                self.wfile.write(body or NOT_FOUND)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the server and closes its socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def record_fixtures(event_id, player_id, team_id, league_id, season_id, directory=FIXTURES_DIR):
+    """
+    Replaces the fixtures with the current responses of the real API for the given IDs. Run it from
+    the repository root, so pvd_Sofascore can be imported.
+
+    Args:
+        event_id (int): A finished event.
+        player_id (int): A player of the league and season.
+        team_id (int): A team of the league and season.
+        league_id (int): The unique tournament.
+        season_id (int): The season. The events of its first round are recorded too.
+    """
+    import pvd_Sofascore
+
+    paths = {
+        'event.json': f'/event/{event_id}',
+        'event_lineups.json': f'/event/{event_id}/lineups',
+        'event_average_positions.json': f'/event/{event_id}/average-positions',
+        'event_graph.json': f'/event/{event_id}/graph',
+        'event_shotmap.json': f'/event/{event_id}/shotmap',
+        'event_incidents.json': f'/event/{event_id}/incidents',
+        'event_statistics.json': f'/event/{event_id}/statistics',
+        'event_highlights.json': f'/event/{event_id}/highlights',
+        'player_statistics.json': f'/player/{player_id}/unique-tournament/{league_id}/season/{season_id}/statistics/overall',
+        'player_heatmap.json': f'/player/{player_id}/unique-tournament/{league_id}/season/{season_id}/heatmap/overall',
+        'player_seasons.json': f'/player/{player_id}/statistics/seasons',
+        'player_attributes.json': f'/player/{player_id}/attribute-overviews',
+        'team.json': f'/team/{team_id}',
+        'team_statistics.json': f'/team/{team_id}/unique-tournament/{league_id}/season/{season_id}/statistics/overall',
+        'standings.json': f'/unique-tournament/{league_id}/season/{season_id}/standings/total',
+        'season_rounds.json': f'/unique-tournament/{league_id}/season/{season_id}/rounds',
+        'round_events.json': f'/unique-tournament/{league_id}/season/{season_id}/events/round/1',
+    }
+    for name, path in paths.items():
+        data = pvd_Sofascore.request_to_json(f'https://www.sofascore.com/api/v1{path}')
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        print(f'Recorded {name}')
@@ -0,0 +1,255 @@
+"""
+Offline benchmarks of the batch drivers of pvd_Sofascore against the local fake API in fake_api.py.
+
+Each driver is run at several scales and the throughput, request latency, bytes transferred,
+parse time and peak memory are reported. Results can be saved and compared against a baseline
+to catch performance regressions. The fake API runs in the same process, so compare results
+taken on the same machine with the same options.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --drivers momentum lineups --scales 10 100 --latency 0.02
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --import-budget 1.0
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import pvd_Sofascore as sofascore
+from fake_api import FakeSofascoreAPI
+
+
+LEAGUE_ID = 703
+SEASON_ID = 57782
+
+# Fresh IDs for every run, so nothing is served from the event repository or the player tournament index
+_ids = itertools.count(10000000, 100000)
+
+
+def events(n):
+    start = next(_ids)
+    return list(range(start, start + n))
+
+
+def players(n):
+    start = next(_ids)
+    return [{'id': player_id} for player_id in range(start, start + n)]
+
+
+def teams(n):
+    start = next(_ids)
+    return list(range(start, start + n))
+
+
+def seasons(n):
+    start = next(_ids)
+    return list(range(start, start + n))
+
+
+# Name: (function running the driver on the items with the given workers, function building n items)
+DRIVERS = {
+    'momentum': (lambda items, workers: sofascore.get_momentum_from_events(items, max_workers=workers, resume=False), events),
+    'shotmap': (lambda items, workers: sofascore.get_shotmap_from_events(items, max_workers=workers, resume=False), events),
+    'incidents': (lambda items, workers: sofascore.get_incidents_from_events(items, max_workers=workers, resume=False), events),
+    'event_statistics': (lambda items, workers: sofascore.get_statistics_from_events(items, max_workers=workers, resume=False), events),
+    'highlights': (lambda items, workers: sofascore.get_highlights_from_events(items, max_workers=workers, resume=False), events),
+    'lineups': (lambda items, workers: sofascore.get_lineups_from_single_event(items, max_workers=workers, resume=False), events),
+    'results': (lambda items, workers: sofascore.get_results_from_single_event(items, max_workers=workers, resume=False), events),
+    'player_statistics': (lambda items, workers: sofascore.get_statistics_from_players(items, LEAGUE_ID, SEASON_ID, max_workers=workers, resume=False), players),
+    'attributes': (lambda items, workers: sofascore.get_attributes_from_players(items, max_workers=workers, resume=False), players),
+    'heatmap': (lambda items, workers: sofascore.get_heatmap_from_players(items, max_workers=workers, resume=False), players),
+    'team_statistics': (lambda items, workers: sofascore.get_statistics_from_team_ids(items, LEAGUE_ID, SEASON_ID, max_workers=workers, resume=False), teams),
+    'standings': (lambda items, workers: [sofascore.get_tournament_standing(LEAGUE_ID, season_id) for season_id in items], seasons),
+    # One request per round, the items are the rounds of a season
+    'season_rounds': (lambda items, workers: sofascore.get_total_event_from_season(LEAGUE_ID, SEASON_ID, len(items), max_workers=workers), events),
+    # Discovery of every event of a season: its rounds, then the events of each round
+    'season_events': (lambda items, workers: [event for season_id in items
+                                              for event in sofascore.get_events_from_season(LEAGUE_ID, season_id, max_workers=workers)], seasons),
+}
+
+
+class TimedTransport(sofascore.HTTPTransport):
+    """
+    HTTPTransport that keeps the latency of every request, to report exact percentiles.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    def get(self, api_url, headers=None):
+        start = time.perf_counter()
+        try:
+            return super().get(api_url, headers)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def run_case(name, scale, server, workers, memory):
+    """
+    Runs one driver on a number of items in a temporary directory, so its outputs do not touch data/.
+
+    Returns:
+        dict: The measurements of the run.
+    """
+    run, make_items = DRIVERS[name]
+    items = make_items(scale)
+
+    transport = TimedTransport('127.0.0.1', server.port, https=False, max_connections=workers)
+    sofascore.set_transport(transport)
+    sofascore.set_rate_limit(1e9, 10 ** 9)  # The fake API is not rate limited
+    sofascore.set_cache(None)
+    sofascore.get_event_repository().clear()
+    sofascore.set_metrics(sofascore.Metrics())
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            if memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run(items, workers)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if memory else None
+        finally:
+            if memory:
+                tracemalloc.stop()
+            os.chdir(cwd)
+
+    counters = sofascore.get_metrics().summary()['counters']
+
+    def total(counter, **labels):
+        return sum(entry['value'] for entry in counters.get(counter, [])
+                   if all(entry.get(k) == v for k, v in labels.items()))
+
+    latencies = np.array(transport.latencies) * 1000
+    return {
+        'driver': name,
+        'scale': scale,
+        'seconds': seconds,
+        'items_per_second': scale / seconds,
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / seconds,
+        'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'latency_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+        'megabytes': total('response_bytes') / 1e6,
+        'json_seconds': total('parse_seconds', stage='json'),
+        'frames_seconds': total('parse_seconds', stage='frames'),
+        'rows': len(result) if isinstance(result, (pd.DataFrame, list)) else None,
+        'peak_memory_mb': peak / 1e6 if peak is not None else None,
+    }
+
+
+def measure_import_time(repeat=3):
+    """
+    Measures the time to import pvd_Sofascore in a fresh interpreter, keeping the best of a few runs.
+    """
+    code = 'import time; start = time.perf_counter(); import pvd_Sofascore; print(time.perf_counter() - start)'
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares the results against a baseline, returning a message for each regression.
+    """
+    previous = {(r['driver'], r['scale']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['driver'], result['scale']))
+        if before is None:
+            continue
+
+        label = f"{result['driver']} x{result['scale']}"
+        if result['items_per_second'] < before['items_per_second'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {result['items_per_second']:.1f} items/s, was {before['items_per_second']:.1f}")
+        if result['peak_memory_mb'] and before.get('peak_memory_mb') and result['peak_memory_mb'] > before['peak_memory_mb'] * (1 + tolerance):
+            regressions.append(f"{label}: peak memory {result['peak_memory_mb']:.1f} MB, was {before['peak_memory_mb']:.1f}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drivers', nargs='+', choices=list(DRIVERS), default=list(DRIVERS), help='Drivers to run. Default is all.')
+    parser.add_argument('--scales', nargs='+', type=int, default=[10, 100, 500], help='Numbers of items. Default is 10 100 500.')
+    parser.add_argument('--workers', type=int, default=8, help='max_workers of the drivers and connections of the pool. Default is 8.')
+    parser.add_argument('--latency', type=float, default=0, help='Seconds each fake response is delayed. Default is 0.')
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc, which slows the runs down.')
+    parser.add_argument('--output', help='File to save the results to as JSON.')
+    parser.add_argument('--baseline', help='Results saved by a previous run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown or memory growth over the baseline. Default is 0.25.')
+    parser.add_argument('--import-budget', type=float, help='Maximum seconds allowed to import pvd_Sofascore.')
+    args = parser.parse_args(argv)
+
+    import_seconds = measure_import_time()
+    print(f'Import time: {import_seconds * 1000:.0f} ms')
+
+    results = []
+    with FakeSofascoreAPI(latency=args.latency) as server:
+        for name in args.drivers:
+            # Warm up the code paths and connections of the driver before measuring it
+            run_case(name, 2, server, args.workers, memory=False)
+
+            for scale in args.scales:
+                # Separate runs for timing and memory, since tracemalloc distorts the timings
+                result = run_case(name, scale, server, args.workers, memory=False)
+                if not args.no_memory:
+                    result['peak_memory_mb'] = run_case(name, scale, server, args.workers, memory=True)['peak_memory_mb']
+                results.append(result)
+                print(f"{name} x{scale}: {result['items_per_second']:.1f} items/s")
+
+    table = pd.DataFrame(results).set_index(['driver', 'scale'])
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:.2f}'.format):
+        print(table)
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'workers': args.workers,
+            'latency': args.latency,
+            'import_seconds': import_seconds,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if args.import_budget is not None and import_seconds > args.import_budget:
+        failures.append(f'Import time {import_seconds:.3f} s over the budget of {args.import_budget:.3f} s')
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            failures += compare(results, json.load(f), args.tolerance)
+
+    for failure in failures:
+        print(f'REGRESSION: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
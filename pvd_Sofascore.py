@@ -1,21 +1,74 @@
 import pandas as pd
+import numpy as np
 import re
-import requests
+import importlib
+import importlib.util
 import http.client
 import json
+import csv
 import time
 import os
-from bs4 import BeautifulSoup
+import shutil
+import threading
+import sqlite3
+import zlib
+import hashlib
+import functools
+import random
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from email.utils import parsedate_to_datetime
+
+
+class _LazyModule:
+    """
+    Stands in for a module that only a few functions need, importing it on first use so that
+    importing this module stays fast.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Only the HTML scrapers and the async client need these
+requests = _LazyModule('requests')
+bs4 = _LazyModule('bs4')
+asyncio = _LazyModule('asyncio')
+
+
+def instrument_driver(func):
+    """
+    Records the calls, errors and duration of a driver in the shared metrics, see get_metrics.
+    Defined here since the drivers below are decorated with it.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = get_metrics()
+        start = time.perf_counter()
+        metrics.inc('driver_calls', driver=func.__name__)
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            metrics.inc('driver_errors', driver=func.__name__)
+            raise
+        finally:
+            metrics.inc('driver_seconds', time.perf_counter() - start, driver=func.__name__)
+
+    return wrapper
 
 
 # Main functions
 
 
+@instrument_driver
 def get_teams_from_league(league_url):
     """
     Extracts team information from a Sofascore league URL.
@@ -27,7 +80,7 @@ def get_teams_from_league(league_url):
         list: A list of dictionaries containing team details, including name, ID, logo, league, country, season, and link.
     """
     teams_dic = []
-    seen_links = []
+    seen_links = set()
     j = 0
 
     # Extract tournament_id and season_id from the URL
@@ -47,15 +100,14 @@ def get_teams_from_league(league_url):
     teams_id = standings['teams_id']
 
     try:
+        get_rate_limiter().acquire()
         response = requests.get(league_url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        links = soup.find_all('a', href=True)
+        links = get_html_links(response.content)
 
-        for link in links:
-            href = link['href']
+        for href in links:
 
             if href not in seen_links:
-                seen_links.append(href)
+                seen_links.add(href)
 
                 if '/es/equipo/futbol/' in href:
                     full_link = 'https://www.sofascore.com' + href
@@ -77,13 +129,13 @@ def get_teams_from_league(league_url):
         print(f'Error during request: {e}')
     
     # Export to CSV
-    os.makedirs('data', exist_ok=True)
     teams_df = pd.DataFrame(teams_dic)
-    teams_df.to_csv('data/sofascore_teams.csv', index=False, encoding='utf-8')
+    write_table(teams_df, 'data/sofascore_teams.csv')
 
     return teams_dic
 
 
+@instrument_driver
 def get_events_from_league(league_url):
     """
     Extracts event results from a Sofascore league URL.
@@ -94,6 +146,12 @@ def get_events_from_league(league_url):
     Returns:
         list: A list of dictionaries containing event details, including round number, season, and link.
     """
+    # Selenium is only needed here, so it is imported on first use
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     if not league_url.endswith(',tab:matches'):
         league_url += ',tab:matches'
     
@@ -193,26 +251,83 @@ def get_events_from_league(league_url):
         driver.quit()
     
     # Export to CSV
-    os.makedirs('data', exist_ok=True)
     events_df = pd.DataFrame(events_dic)
-    events_df.to_csv('data/sofascore_events.csv', index=False, encoding='utf-8')
+    write_table(events_df, 'data/sofascore_events.csv')
+
+    return events_dic
+
+
+@instrument_driver
+def get_events_from_season(league_id, season_id, delay=0, max_workers=4):
+    """
+    Lists every event of a league season through the API, without a browser. It returns the same
+    fields as get_events_from_league and writes the same output.
+
+    Args:
+        league_id (int): Unique identifier of the league (unique tournament).
+        season_id (int): Unique identifier of the season.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of rounds fetched at the same time. Default is 4.
+
+    Returns:
+        list: A list of dictionaries containing event details, including round number, season, and link.
+    """
+    rounds = get_season_rounds(league_id, season_id)
+    events_dic = []  # List to store each event as a separate row
+    seen = set()  # Events already listed, since postponed matches can show up in two rounds
+
+    fetch_round = lambda round: get_round_events(league_id, season_id, round['round'], round.get('slug'))
+    for round, events, error in fetch_concurrently(fetch_round, rounds, max_workers, delay):
+        if error is not None:
+            print(f"Error retrieving events for round {round['round']}: {error}")
+            continue
+
+        for event in events:
+            event_id = str(event['id'])
+            if event_id in seen:
+                continue
+            seen.add(event_id)
+
+            round_result = {
+                'id': event_id,
+                'league': event['tournament']['name'],
+                'league_id': event['tournament']['uniqueTournament']['id'],
+                'country': event['tournament']['category']['name'],
+                'round': event.get('roundInfo', {}).get('round', round['round']),
+                'season': event['season'].get('year'),
+                'season_id': event['season']['id'],
+                'home_team_id': event['homeTeam']['id'],
+                'away_team_id': event['awayTeam']['id'],
+                'link': f"https://www.sofascore.com/{event['slug']}/{event['customId']}#id:{event_id}"
+            }
+
+            events_dic.append(round_result)
+
+    # Export to CSV
+    events_df = pd.DataFrame(events_dic)
+    write_table(events_df, 'data/sofascore_events.csv')
 
     return events_dic
 
 
-def get_players_from_teams(teams, delay=5):
+@instrument_driver
+def get_players_from_teams(teams, delay=0, seen_players=None):
     """
     Extracts player information from team URLs on Sofascore.
 
     Args:
         teams (list): List of dictionaries, each containing team details and URL.
-        delay (int): Time to wait (in seconds) between requests to avoid overloading the server. Default is 5 seconds.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        seen_players (set, optional): IDs of the players already collected, shared across calls to pull several
+            leagues without repeating players. It is updated with the new players.
 
     Returns:
         list: A list of dictionaries with player information.
     """
     players_dic = []  # List to store player information
-    repeated = []  # List to keep track of processed links
+    if seen_players is None:
+        seen_players = set()
+    repeated = set()  # Links already processed
 
     for team in teams:
         time.sleep(delay)  # Respect the delay between requests
@@ -224,19 +339,23 @@ def get_players_from_teams(teams, delay=5):
         url = team['link']
 
         # Make the request and parse the page content
+        get_rate_limiter().acquire()
         response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        links = soup.find_all('a', href=True)
+        links = get_html_links(response.content)
 
-        for link in links:
-            href = link['href']
+        for href in links:
 
             if href not in repeated:
-                repeated.append(href)
+                repeated.add(href)
 
                 if '/es/jugador/' in href:
                     full_link = 'https://www.sofascore.com' + href
                     id = href.rstrip('/').split('/')[-1]
+
+                    # Skip players already collected, e.g. from another league
+                    if id in seen_players:
+                        continue
+                    seen_players.add(id)
                     name = href.rstrip('/').split('/')[-2].replace('-', ' ').title()
                     profile = f'https://api.sofascore.app/api/v1/player/{id}/image'
 
@@ -254,26 +373,30 @@ def get_players_from_teams(teams, delay=5):
                     players_dic.append(player_info)
 
     # Export to CSV
-    os.makedirs('data', exist_ok=True)
     players_df = pd.DataFrame(players_dic)
-    players_df.to_csv('data/sofascore_players.csv', index=False, encoding='utf-8')
+    write_table(players_df, 'data/sofascore_players.csv')
 
     return players_dic
 
 
-def get_players_from_team_ids(teams, delay=5, language='es'):
+@instrument_driver
+def get_players_from_team_ids(teams, delay=0, language='es', seen_players=None):
     """
     Extracts player information from team URLs on Sofascore.
 
     Args:
         teams (list): List of dictionaries, each containing team details and URL.
-        delay (int): Time to wait (in seconds) between requests to avoid overloading the server. Default is 5 seconds.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        seen_players (set, optional): IDs of the players already collected, shared across calls to pull several
+            leagues without repeating players. It is updated with the new players.
 
     Returns:
         list: A list of dictionaries with player information.
     """
     players_dic = []  # List to store player information
-    repeated = []  # List to keep track of processed links
+    if seen_players is None:
+        seen_players = set()
+    repeated = set()  # Links already processed
 
     for team in teams:
         time.sleep(delay)  # Respect the delay between requests
@@ -290,19 +413,23 @@ def get_players_from_team_ids(teams, delay=5, language='es'):
             url = f'https://www.sofascore.com/team/football/{slug}/{team_id}'
 
         # Make the request and parse the page content
+        get_rate_limiter().acquire()
         response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        links = soup.find_all('a', href=True)
+        links = get_html_links(response.content)
 
-        for link in links:
-            href = link['href']
+        for href in links:
 
             if href not in repeated:
-                repeated.append(href)
+                repeated.add(href)
 
                 if '/es/jugador/' in href:
                     full_link = 'https://www.sofascore.com' + href
                     id = href.rstrip('/').split('/')[-1]
+
+                    # Skip players already collected, e.g. from another league
+                    if id in seen_players:
+                        continue
+                    seen_players.add(id)
                     name = href.rstrip('/').split('/')[-2].replace('-', ' ').title()
                     profile = f'https://api.sofascore.app/api/v1/player/{id}/image'
 
@@ -318,334 +445,116 @@ def get_players_from_team_ids(teams, delay=5, language='es'):
                     players_dic.append(player_info)
 
     # Export to CSV
-    os.makedirs('data', exist_ok=True)
     players_df = pd.DataFrame(players_dic)
-    players_df.to_csv('data/sofascore_players.csv', index=False, encoding='utf-8')
+    write_table(players_df, 'data/sofascore_players.csv')
 
     return players_dic
 
 
-def get_heatmap_from_players(players, delay=5):
+@instrument_driver
+def get_heatmap_from_players(players, delay=0, max_workers=4, resume=True, league_ids=None, season_ids=None):
     """
     Fetches heatmap data for a list of players from Sofascore API.
 
     Args:
         players (list of dict): List of player dictionaries with 'player_id'.
-        delay (int): Delay in seconds between API requests to avoid rate limiting.
+        delay (int): Extra delay in seconds between API requests, on top of the shared rate limit.
+        max_workers (int): Maximum number of players fetched at the same time. Default is 4.
+        resume (bool): If True, the players saved in the checkpoint of an interrupted run are not fetched again. Default is True.
+        league_ids (list, optional): Only fetch the heatmaps of these leagues, e.g. [155]. Defaults to every league.
+        season_ids (list, optional): Only fetch the heatmaps of these seasons. Defaults to every season.
 
     Returns:
         DataFrame: Combined heatmap data for all players and tournaments.
     """
-    
-    dfs = []
+    fetch_heatmaps = lambda player: get_player_heatmaps(player['id'], league_ids, season_ids)
+    try:
+        return run_batch(fetch_heatmaps, players, 'data/sofascore_heatmap.csv', 'heatmap', key='player_id',
+                         item_id=lambda player: player['id'], item_name='player', delay=delay,
+                         max_workers=max_workers, resume=resume, scope=(league_ids, season_ids))
+    finally:
+        # Keep the discovered tournaments for the next runs
+        get_player_tournament_index().save()
 
-    for player in players:
-        time.sleep(delay)
-        player_id = player['id']
-        
-        # Get tournaments for the current player
-        try:
-            tournaments = get_player_tournaments(player_id)
-        except:
-            continue
-        
-        # Loop through each tournament
-        for _, row in tournaments.iterrows():
-            league_id = row['tournaments_id']
-            season_id = row['season_id']
 
-            # Get heatmap for the current player, league, and season
-            try:
-                heatmap_tournament = get_heatmap(player_id, league_id, season_id)
-                dfs.append(heatmap_tournament)
-            except:
-                continue
+def get_event_id_from_link(event_info):
+    """
+    Extracts the event ID from the link of an event, e.g. '.../equipo-a-equipo-b/abc#id:123'.
 
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)
-        heatmaps_df = pd.concat(dfs, ignore_index=True)
-        heatmaps_df.to_csv('data/sofascore_heatmap.csv', index=False, encoding='utf-8')
-    else:
-        heatmaps_df = pd.DataFrame()
-        print("No heatmap data was collected.")
+    Args:
+        event_info (dict): Dictionary with the 'link' of the event.
 
-    return heatmaps_df
+    Returns:
+        str: The event ID, or None if the link has none.
+    """
+    event = re.search(r'id:(\d+)', event_info['link'])
+    return event.group(1) if event else None
 
 
-def get_lineups_from_events(events, delay=5):
+@instrument_driver
+def get_lineups_from_events(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Processes a list of events to extract and organize lineup data and average player positions.
 
     Args:
         events (list): List of dictionaries containing event information.
-        delay (int): Time to wait (in seconds) between requests to avoid overloading the server. Default is 5 seconds.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         pd.DataFrame: A DataFrame containing the lineup data and average player positions for all processed events.
     """
-    dfs = []  # Initialize a list to store DataFrames for each event
-
-    for i in range(len(events)):
-        time.sleep(delay)  # Wait before making the next request
-
-        event = re.search(r'id:(\d+)', events[i]['link'])
-        event_id = event.group(1) if event else 'unknown'
-        
-        try:
-            data = get_event_data(event_id)
-            status = data['event']['status']['type']
-
-            if status == 'finished':
-                # Get lineup, average positions, and event data
-                lineups = get_lineups(event_id)
-                average_positions = get_average_positions(event_id)
-
-                # Extract and process formations for home and away teams
-                home_formation = lineups['home']['formation']
-                away_formation = lineups['away']['formation']
-
-                # Process home formation
-                home_groups_formation = home_formation.split('-')
-                home_def = int(home_groups_formation[0])
-                home_ata = int(home_groups_formation[-1])
-
-                if len(home_groups_formation) == 4:
-                    home_mid_0 = int(home_groups_formation[1])
-                    home_mid_1 = 0
-                    home_mid_2 = int(home_groups_formation[2])
-                else:
-                    home_mid_0 = 0
-                    home_mid_1 = int(home_groups_formation[1])
-                    home_mid_2 = 0
-
-                # Process away formation
-                away_groups_formation = away_formation.split('-')
-                away_def = int(away_groups_formation[0])
-                away_ata = int(away_groups_formation[-1])
-
-                if len(away_groups_formation) == 4:
-                    away_mid_0 = int(away_groups_formation[1])
-                    away_mid_1 = 0
-                    away_mid_2 = int(away_groups_formation[2])
-                else:
-                    away_mid_0 = 0
-                    away_mid_1 = int(away_groups_formation[1])
-                    away_mid_2 = 0
-
-                # Initialize lists to store player data
-                home = []
-                away = []
-                home_avg = []
-                away_avg = []
-
-                # Process home team players
-                for j in range(len(lineups['home']['players'])):
-                    player = lineups['home']['players'][j]
-                    name = player['player']['name']
-                    id = player['player']['id']
-                    jersey = player['shirtNumber']
-                    position = player.get('position', '')
-                    substitute = player['substitute']
-                    minutes = player.get('statistics', {}).get('minutesPlayed', 0)
-
-                    if j < len(average_positions['home']):
-                        avg_player = average_positions['home'][j]
-                        avg_id = avg_player['player']['id']
-                        averageX = avg_player['averageX']
-                        averageY = avg_player['averageY']
-                        pointsCount = avg_player['pointsCount']
-
-                    order = j + 1
-                    line, lat, pos = determine_position(order, home_def, home_mid_0, home_mid_1, home_mid_2, home_ata, substitute)
-                    
-                    # Append player data to home list
-                    home.append([name, id, jersey, position, substitute, minutes, order, line, lat, pos])
-                    home_avg.append([avg_id, averageX, averageY, pointsCount])
-
-                # Process away team players
-                for k in range(len(lineups['away']['players'])):
-                    player = lineups['away']['players'][k]
-                    name = player['player']['name']
-                    id = player['player']['id']
-                    jersey = player['shirtNumber']
-                    position = player.get('position', '')
-                    substitute = player['substitute']
-                    minutes = player.get('statistics', {}).get('minutesPlayed', 0)
-
-                    if k < len(average_positions['away']):
-                        avg_player = average_positions['away'][k]
-                        avg_id = avg_player['player']['id']
-                        averageX = avg_player['averageX']
-                        averageY = avg_player['averageY']
-                        pointsCount = avg_player['pointsCount']
-
-                    order = k + 1
-                    line, lat, pos = determine_position(order, away_def, away_mid_0, away_mid_1, away_mid_2, away_ata, substitute)
-
-                    # Append player data to away list
-                    away.append([name, id, jersey, position, substitute, minutes, order, line, lat, pos])
-                    away_avg.append([avg_id, averageX, averageY, pointsCount])
-
-                # Create DataFrames for home and away teams
-                home_df = pd.DataFrame(home, columns=['player', 'id', 'jersey', 'position', 'substitute', 'minutes', 'order', 'line', 'lat', 'pos'])
-                home_df['local'] = 'Home'
-                home_df['team'] = data['event']['homeTeam']['shortName']
-                home_df['formation'] = home_formation
-                home_df['defense'] = home_def
-                home_df['midfield'] = home_mid_0 + home_mid_1 + home_mid_2
-                home_df['attack'] = home_ata
-
-                away_df = pd.DataFrame(away, columns=['player', 'id', 'jersey', 'position', 'substitute', 'minutes', 'order', 'line', 'lat', 'pos'])
-                away_df['local'] = 'Away'
-                away_df['team'] = data['event']['awayTeam']['shortName']
-                away_df['formation'] = away_formation
-                away_df['defense'] = away_def
-                away_df['midfield'] = away_mid_0 + away_mid_1 + away_mid_2
-                away_df['attack'] = away_ata
-
-                # Create DataFrame for average player positions
-                home_avg_position = pd.DataFrame(home_avg, columns=['avg_id', 'averageX', 'averageY', 'pointsCount'])
-                away_avg_position = pd.DataFrame(away_avg, columns=['avg_id', 'averageX', 'averageY', 'pointsCount'])
-                df_avg_position = pd.concat([home_avg_position, away_avg_position], ignore_index=True)
-                df_avg_position.rename(columns={'avg_id': 'id'}, inplace=True)
-
-                # Merge lineup data with average position data
-                df = pd.concat([home_df, away_df], ignore_index=True)
-                df_merged = pd.merge(df, df_avg_position, on='id', how='left')
-
-                # Append the DataFrame to the list
-                dfs.append(df_merged)
+    def fetch_lineup(event_info):
+        event_id = get_event_id_from_link(event_info)
+        return get_event_lineup(event_id) if event_id else None
 
-        except Exception as e:
-            print(f"Error in processing lineup for event {event_id}: {e}")
-
-    # Concatenate all DataFrames into one and save to CSV
-    os.makedirs('data', exist_ok=True)
-    lineups_df = pd.concat(dfs, ignore_index=True)
-    lineups_df.to_csv('data/sofascore_lineup.csv', index=False, encoding='utf-8')
+    return run_batch(fetch_lineup, events, 'data/sofascore_lineup.csv', 'lineup', item_id=get_event_id_from_link,
+                     delay=delay, max_workers=max_workers, incremental=incremental, resume=resume)
 
-    return lineups_df
 
-
-def get_results_from_events(events, delay=5):
+@instrument_driver
+def get_results_from_events(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Extracts match results from a list of events and returns a DataFrame.
 
     Args:
         events (list): A list of event dictionaries, each containing an 'id'.
-        delay (int, optional): Delay in seconds between requests. Default is 5 seconds.
+        delay (int, optional): Extra delay in seconds between requests. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         pd.DataFrame: A DataFrame containing match results for each event.
     """
-    # List to store DataFrames for each event
-    dfs = []
-
-    for event in events:
-        # Respect the delay between requests to avoid overloading the server
-        time.sleep(delay)
-
-        # Extract the event ID from the event dictionary
-        event_id = event['id']
-
-        # Fetch event data using the event ID
-        event_data = get_event_data(event_id)
-        status = event_data['event']['status']['type']
-
-        if status == 'finished':
-            # Extract necessary details from the event data
-            homeTeam_name = event_data['event']['homeTeam']['shortName']
-            homeTeam_id = event_data['event']['homeTeam']['id']
-            homeScore = int(event_data['event']['homeScore']['display'])
-            awayTeam_name = event_data['event']['awayTeam']['shortName']
-            awayTeam_id = event_data['event']['awayTeam']['id']
-            awayScore = int(event_data['event']['awayScore']['display'])
-
-            # Create a dictionary for the home team
-            home_dic = {
-                'event_id': event_id,
-                'team': homeTeam_name,
-                'team_id': homeTeam_id,
-                'score_for': homeScore,
-                'score_against': awayScore,
-                'win': homeScore > awayScore,
-                'draw': homeScore == awayScore,
-                'loose': homeScore < awayScore,
-                'local': 'Home'
-            }
-
-            # Create a dictionary for the away team
-            away_dic = {
-                'event_id': event_id,
-                'team': awayTeam_name,
-                'team_id': awayTeam_id,
-                'score_for': awayScore,
-                'score_against': homeScore,
-                'win': awayScore > homeScore,
-                'draw': awayScore == homeScore,
-                'loose': awayScore < homeScore,
-                'local': 'Away'
-            }
+    return run_batch(lambda event: get_event_result(event['id']), events, 'data/sofascore_results.csv', 'result',
+                     item_id=lambda event: event['id'], delay=delay, max_workers=max_workers,
+                     incremental=incremental, resume=resume)
 
-            # Convert the dictionaries into DataFrames
-            home_df = pd.DataFrame([home_dic])
-            away_df = pd.DataFrame([away_dic])
 
-            # Concatenate the home and away DataFrames into a single DataFrame
-            df = pd.concat([home_df, away_df], ignore_index=True)
-
-            # Append the DataFrame to the list
-            dfs.append(df)
-
-    # Concatenate all the DataFrames into one final DataFrame
-    results_df = pd.concat(dfs, ignore_index=True)
-
-    # Export the final DataFrame to a CSV file
-    os.makedirs('data', exist_ok=True)
-    results_df.to_csv('data/sofascore_results.csv', index=False, encoding='utf-8')
-
-    return results_df
-
-
-def get_attributes_from_players(players, delay=5):
+@instrument_driver
+def get_attributes_from_players(players, delay=0, max_workers=4, resume=True):
     """
     Fetches attributes data for a list of players from Sofascore API.
 
     Args:
         players (list of dict): List of player dictionaries with 'player_id'.
-        delay (int): Delay in seconds between API requests to avoid rate limiting.
+        delay (int): Extra delay in seconds between API requests, on top of the shared rate limit.
+        max_workers (int): Maximum number of players fetched at the same time. Default is 4.
+        resume (bool): If True, the players saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: Combined attributes data for all players and tournaments.
     """
-    
-    dfs = []
-
-    for player in players:
-        time.sleep(delay)
-        player_id = player['id']
-        
-        # Get attributes for the current player
-        try:
-            attributes = get_player_attributes(player_id)
-            dfs.append(attributes)
-        except:
-            continue
-        
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)
-        attributes_df = pd.concat(dfs, ignore_index=True)
-        attributes_df.to_csv('data/sofascore_attributes.csv', index=False, encoding='utf-8')
-    else:
-        attributes_df = pd.DataFrame()
-        print("No attributes data was collected.")
-
-    return attributes_df
+    return run_batch(lambda player: get_player_attributes(player['id']), players, 'data/sofascore_attributes.csv',
+                     'attributes', key='player_id', item_id=lambda player: player['id'], item_name='player',
+                     delay=delay, max_workers=max_workers, resume=resume)
 
 
-def get_statistics_from_players(players, league_id, season_id, delay=5):
+@instrument_driver
+def get_statistics_from_players(players, league_id, season_id, delay=0, max_workers=4, resume=True):
     """
     Fetches statistics data for a list of players from the Sofascore API.
 
@@ -653,229 +562,119 @@ def get_statistics_from_players(players, league_id, season_id, delay=5):
         players (list of dict): List of player dictionaries with 'id' key for player IDs.
         league_id (str): The league identifier for the statistics.
         season_id (str): The season identifier for the statistics.
-        delay (int): Delay in seconds between API requests to avoid rate limiting.
-        save_path (str): Path to save the resulting DataFrame as a CSV file.
+        delay (int): Extra delay in seconds between API requests, on top of the shared rate limit.
+        max_workers (int): Maximum number of players fetched at the same time. Default is 4.
+        resume (bool): If True, the players saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: Combined statistics data for all players, or empty DataFrame if none collected.
     """
-    
-    dfs = []
-
-    for player in players:
-        time.sleep(delay)
-        player_id = player['id']
-        
-        # Get statistics for the current player
-        try:
-            statistics = get_player_statistics(player_id, league_id, season_id)
-            dfs.append(statistics)
-        except:
-            continue
-        
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)
-        statistics_df = pd.concat(dfs, ignore_index=True)
-        statistics_df.to_csv('data/sofascore_players_statistics.csv', index=False, encoding='utf-8')
-    else:
-        statistics_df = pd.DataFrame()
-        print("No statistics data was collected.")
-
-    return statistics_df
+    return run_batch(lambda player: get_player_statistics(player['id'], league_id, season_id), players,
+                     'data/sofascore_players_statistics.csv', 'player statistics', key='player_id',
+                     item_id=lambda player: player['id'], item_name='player', delay=delay,
+                     max_workers=max_workers, resume=resume, scope=(str(league_id), str(season_id)))
 
 
-def get_statistics_from_events(events, delay=5):
+@instrument_driver
+def get_statistics_from_events(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Fetches statistics data for a list of events from the Sofascore API.
 
     Args:
         events (list of dict): List of events.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: Combined statistics data for all events, or an empty DataFrame if none collected.
     """
-    
-    dfs = []
-
-    for event in events:
-        time.sleep(delay)  # Wait for the specified delay before making the next request
-        event_id = event
-        
-        # Get statistics for the current event
-        try:
-            statistics = get_event_statistics(event_id)  # Call the function to get statistics
-            dfs.append(statistics)  # Append the statistics DataFrame to the list
-        except Exception as e:
-            print(f"Error retrieving statistics for event {event_id}: {e}")
-            continue  # Continue to the next event if there's an error
-        
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)  # Create the directory if it doesn't exist
-        statistics_df = pd.concat(dfs, ignore_index=True)  # Concatenate all DataFrames
-        statistics_df.to_csv('data/sofascore_events_statistics.csv', index=False, encoding='utf-8')  # Save to CSV
-    else:
-        statistics_df = pd.DataFrame()  # Return an empty DataFrame if no data was collected
-        print("No statistics data was collected.")
-
-    return statistics_df
+    return run_batch(lambda event_id: get_event_statistics(event_id, records=True), events,
+                     'data/sofascore_events_statistics.csv', 'event statistics', delay=delay,
+                     max_workers=max_workers, incremental=incremental, resume=resume)
 
 
-def get_momentum_from_events(events, delay=5):
+@instrument_driver
+def get_momentum_from_events(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Fetches and combines momentum data for a list of events, with an optional delay between requests.
 
     Args:
         events (list): List of event IDs to fetch momentum data for.
-        delay (int, optional): Time in seconds to wait between API requests. Defaults to 5.
+        delay (int, optional): Extra time in seconds to wait between API requests. Defaults to 0.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         pd.DataFrame: Combined DataFrame of momentum data for all events.
     """
-    dfs = []
-
-    for event in events:
-        time.sleep(delay)
-        event_id = event
-        
-        # Attempt to fetch momentum for the current event
-        try:
-            momentum = get_momentum(event_id)
-            dfs.append(momentum)
-        except Exception as e:
-            print(f"Error retrieving momentum for event {event_id}: {e}")
-            continue
-        
-    # Concatenate and save all DataFrames if data was collected
-    if dfs:
-        os.makedirs('data', exist_ok=True)
-        momentum_df = pd.concat(dfs, ignore_index=True)
-        momentum_df.to_csv('data/sofascore_momentum.csv', index=False, encoding='utf-8')
-    else:
-        momentum_df = pd.DataFrame()
-        print("No momentum data was collected.")
-
-    return momentum_df
+    return run_batch(get_momentum, events, 'data/sofascore_momentum.csv', 'momentum', delay=delay,
+                     max_workers=max_workers, incremental=incremental, resume=resume)
 
 
-def get_statistics_from_teams(teams, league_id, season_id, delay=5):
+@instrument_driver
+def get_statistics_from_teams(teams, league_id, season_id, delay=0, max_workers=4, resume=True):
     """
     Fetches statistics data for a list of teams from the Sofascore API.
 
     Args:
-        teams (list of dict): List of team dictionaries with 'id' key for team IDs.
+        teams (list): List of team dictionaries with 'id' key for team IDs.
         league_id (str): The league identifier for the statistics.
         season_id (str): The season identifier for the statistics.
-        delay (int): Delay in seconds between API requests to avoid rate limiting.
-        save_path (str): Path to save the resulting DataFrame as a CSV file.
+        delay (int): Extra delay in seconds between API requests, on top of the shared rate limit.
+        max_workers (int): Maximum number of teams fetched at the same time. Default is 4.
+        resume (bool): If True, the teams saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: Combined statistics data for all teams, or empty DataFrame if none collected.
     """
-    
-    dfs = []
+    return run_batch(lambda team: get_team_statistics(team['id'], league_id, season_id), teams,
+                     'data/sofascore_teams_statistics.csv', 'team statistics', key='team_id',
+                     item_id=lambda team: team['id'], item_name='team', delay=delay, max_workers=max_workers, resume=resume,
+                     scope=(str(league_id), str(season_id)))
 
-    for team in teams:
-        time.sleep(delay)
-        team_id = team['id']
-        
-        # Get statistics for the current team
-        try:
-            statistics = get_team_statistics(team_id, league_id, season_id)
-            dfs.append(statistics)
-        except:
-            continue
-        
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)
-        statistics_df = pd.concat(dfs, ignore_index=True)
-        statistics_df.to_csv('data/sofascore_teams_statistics.csv', index=False, encoding='utf-8')
-    else:
-        statistics_df = pd.DataFrame()
-        print("No statistics data was collected.")
-
-    return statistics_df
 
-
-def get_statistics_from_team_ids(teams, league_id, season_id, delay=5):
+@instrument_driver
+def get_statistics_from_team_ids(teams, league_id, season_id, delay=0, max_workers=4, resume=True):
     """
     Fetches statistics data for a list of teams from the Sofascore API.
 
     Args:
-        teams (list of dict): List of team dictionaries with 'id' key for team IDs.
+        teams (list): List of team IDs.
         league_id (str): The league identifier for the statistics.
         season_id (str): The season identifier for the statistics.
-        delay (int): Delay in seconds between API requests to avoid rate limiting.
-        save_path (str): Path to save the resulting DataFrame as a CSV file.
+        delay (int): Extra delay in seconds between API requests, on top of the shared rate limit.
+        max_workers (int): Maximum number of teams fetched at the same time. Default is 4.
+        resume (bool): If True, the teams saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: Combined statistics data for all teams, or empty DataFrame if none collected.
     """
-    
-    dfs = []
-
-    for team in teams:
-        time.sleep(delay)
-        team_id = team
-        
-        # Get statistics for the current team
-        try:
-            statistics = get_team_statistics(team_id, league_id, season_id)
-            dfs.append(statistics)
-        except:
-            continue
-        
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)
-        statistics_df = pd.concat(dfs, ignore_index=True)
-        statistics_df.to_csv('data/sofascore_teams_statistics.csv', index=False, encoding='utf-8')
-    else:
-        statistics_df = pd.DataFrame()
-        print("No statistics data was collected.")
-
-    return statistics_df
+    return run_batch(lambda team: get_team_statistics(team, league_id, season_id), teams,
+                     'data/sofascore_teams_statistics.csv', 'team statistics', key='team_id', item_name='team',
+                     delay=delay, max_workers=max_workers, resume=resume, scope=(str(league_id), str(season_id)))
 
 
-def get_highlights_from_events(events, delay=5):
+@instrument_driver
+def get_highlights_from_events(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Fetches highlight data for a list of events from the Sofascore API.
 
     Args:
         events (list of dict): List of events.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: Combined highlight data for all events, or an empty DataFrame if none collected.
     """
-    
-    dfs = []
-
-    for event in events:
-        time.sleep(delay)  # Wait for the specified delay before making the next request
-        event_id = event
-        
-        # Get highlight for the current event
-        try:
-            highlight = get_highlights(event_id)  # Call the function to get highlight
-            dfs.append(highlight)  # Append the highlight DataFrame to the list
-        except Exception as e:
-            print(f"Error retrieving highlight for event {event_id}: {e}")
-            continue  # Continue to the next event if there's an error
-        
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)  # Create the directory if it doesn't exist
-        highlight_df = pd.concat(dfs, ignore_index=True)  # Concatenate all DataFrames
-        highlight_df.to_csv('data/sofascore_highlight.csv', index=False, encoding='utf-8')  # Save to CSV
-    else:
-        highlight_df = pd.DataFrame()  # Return an empty DataFrame if no data was collected
-        print("No highlight data was collected.")
-
-    return highlight_df
+    return run_batch(lambda event_id: get_highlights(event_id, records=True), events,
+                     'data/sofascore_highlight.csv', 'highlight', delay=delay, max_workers=max_workers, incremental=incremental, resume=resume)
 
 
+@instrument_driver
 def get_groups_from_league(league_id, season_id):
     """
     Fetches and saves standings for each group in a specified league and season as separate CSV files.
@@ -911,119 +710,74 @@ def get_groups_from_league(league_id, season_id):
         
         # Save group data to CSV
         letter = chr(65 + i)
-        group_df.to_csv(f'data/sofascore_group_{letter}.csv', index=False, encoding='utf-8')
+        write_table(group_df, f'data/sofascore_group_{letter}.csv')
         dfs.append(group_df)
 
     return dfs
 
 
-def get_shotmap_from_events(events, delay=5):
+@instrument_driver
+def get_shotmap_from_events(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Fetches and combines shotmap data for a list of events, with an optional delay between requests.
 
     Args:
         events (list): List of event IDs to fetch shotmap data for.
-        delay (int, optional): Time in seconds to wait between API requests. Defaults to 5.
+        delay (int, optional): Extra time in seconds to wait between API requests. Defaults to 0.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         pd.DataFrame: Combined DataFrame of shotmap data for all events.
     """
-    dfs = []
-
-    for event in events:
-        time.sleep(delay)
-        event_id = event
-        
-        # Attempt to fetch shotmap for the current event
-        try:
-            shotmap = get_shotmap(event_id)
-            dfs.append(shotmap)
-        except Exception as e:
-            print(f"Error retrieving shotmap for event {event_id}: {e}")
-            continue
-        
-    # Concatenate and save all DataFrames if data was collected
-    if dfs:
-        os.makedirs('data', exist_ok=True)
-        shotmap_df = pd.concat(dfs, ignore_index=True)
-        shotmap_df.to_csv('data/sofascore_shotmap.csv', index=False, encoding='utf-8')
-    else:
-        shotmap_df = pd.DataFrame()
-        print("No shotmap data was collected.")
-
-    return shotmap_df
+    return run_batch(get_shotmap, events, 'data/sofascore_shotmap.csv', 'shotmap', delay=delay,
+                     max_workers=max_workers, incremental=incremental, resume=resume)
 
 
-def get_profile_from_players(players, delay=5):
+@instrument_driver
+def get_profile_from_players(players, delay=0, max_workers=4, resume=True):
     """
     Collects profiles of multiple players and saves the data to a CSV file.
 
     Args:
         players (list): A list of dictionaries, each containing a 'link' key with the player's URL.
+        delay (int): Extra delay in seconds between requests, on top of the shared rate limit.
+        max_workers (int): Maximum number of players fetched at the same time. Default is 4.
+        resume (bool): If True, the players saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: A pandas DataFrame containing the collected player profiles.
     """
-    dfs = []
-
-    for player in players:
-        time.sleep(delay)
-        player_url = player['link']
-        player_data = get_player_profile(player_url)
-        dfs.append(player_data)
-
-    if dfs:
-        # Create a directory to store the data
-        os.makedirs('data', exist_ok=True)
-
-        # Convert the data into a DataFrame and save it as a CSV file
-        player_profile_df = pd.DataFrame(dfs)
-        player_profile_df.to_csv('data/sofascore_player_profile.csv', index=False, encoding='utf-8')
-    else:
-        player_profile_df = pd.DataFrame()
-        print("No player profile was collected.")
+    def fetch_profile(player):
+        player_data = get_player_profile(player['link'])
+        return pd.DataFrame([player_data])
 
-    return player_profile_df
+    return run_batch(fetch_profile, players, 'data/sofascore_player_profile.csv', 'player profile', key='player_id',
+                     item_id=lambda player: player['link'].rstrip('/').split('/')[-1], item_name='player',
+                     delay=delay, max_workers=max_workers, resume=resume)
 
 
-def get_incidents_from_events(events, delay=5):
+@instrument_driver
+def get_incidents_from_events(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Fetches incident data for a list of events from the Sofascore API.
 
     Args:
         events (list of dict): List of events.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         DataFrame: Combined incident data for all events, or an empty DataFrame if none collected.
     """
-    
-    dfs = []
-
-    for event in events:
-        time.sleep(delay)  # Wait for the specified delay before making the next request
-        event_id = event
-        
-        # Get incidents for the current event
-        try:
-            incidents = get_incidents(event_id)  # Call the function to get incidents
-            dfs.append(incidents)  # Append the incident DataFrame to the list
-        except Exception as e:
-            print(f"Error retrieving incidents for event {event_id}: {e}")
-            continue  # Continue to the next event if there's an error
-        
-    # Concatenate all dataframes and save to CSV
-    if dfs:
-        os.makedirs('data', exist_ok=True)  # Create the directory if it doesn't exist
-        incidents_df = pd.concat(dfs, ignore_index=True)  # Concatenate all DataFrames
-        incidents_df.to_csv('data/sofascore_incidents.csv', index=False, encoding='utf-8')  # Save to CSV
-    else:
-        incidents_df = pd.DataFrame()  # Return an empty DataFrame if no data was collected
-        print("No incident data was collected.")
-
-    return incidents_df
+    return run_batch(get_incidents, events, 'data/sofascore_incidents.csv', 'incidents', delay=delay,
+                     max_workers=max_workers, incremental=incremental, resume=resume)
 
 
-def get_total_event_from_season(league_id, season_id, rounds, delay=5):
+@instrument_driver
+def get_total_event_from_season(league_id, season_id, rounds, delay=0, max_workers=4, incremental=False):
     """
     Fetches unique event details from a given league, season, and rounds.
 
@@ -1031,38 +785,43 @@ def get_total_event_from_season(league_id, season_id, rounds, delay=5):
         league_id (str): Unique identifier for the league.
         season_id (str): Unique identifier for the season.
         rounds (list): List of round numbers to fetch events for.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of rounds fetched at the same time. Default is 4.
+        incremental (bool): If True, rounds whose events were all finished in the previous output are not fetched again. Default is False.
 
     Returns:
         pandas.DataFrame: DataFrame containing event details for the specified rounds.
     """
     events = []
 
-    # Iterate over rounds to fetch event details
-    for round in range(rounds):
-        round_number = round + 1
-        time.sleep(delay)
-        api_url = f'https://www.sofascore.com/api/v1/unique-tournament/{league_id}/season/{season_id}/events/round/{round_number}'
-        data = request_to_json(api_url)
+    # In incremental mode, keep the rounds that were already complete in the previous output
+    completed_rounds = set()
+    if incremental:
+        existing = read_existing_output('data/sofascore_events_total.csv')
+        if 'status' in existing.columns:
+            finished = (existing['status'] == 'finished').groupby(existing['round_number']).all()
+            completed_rounds = set(finished[finished].index)
+
+    # Fetch the pending rounds concurrently, keeping their order
+    pending = [round for round in range(rounds) if round not in completed_rounds]
+    fetch_round = lambda round: get_round_events(league_id, season_id, round + 1)
+    for round, round_events, error in fetch_concurrently(fetch_round, pending, max_workers, delay):
+        if error is not None:
+            print(f"Error retrieving events for round {round + 1}: {error}")
+            continue
 
         # Extract event IDs and related details
-        for event in range(len(data['events'])):
-            event_id = data['events'][event]['id']
-            home_id = data['events'][event]['homeTeam']['id']
-            home_shortName = data['events'][event]['homeTeam']['shortName']
-            home_score = data['events'][event].get('homeScore', {}).get('display', )
-            away_id = data['events'][event]['awayTeam']['id']
-            away_shortName = data['events'][event]['awayTeam']['shortName']
-            away_score = data['events'][event].get('awayScore', {}).get('display', )
-
+        for event in round_events:
             event_dic = {
-                'event_id': event_id,
+                'event_id': event['id'],
                 'round_number': round,
-                'home_id': home_id,
-                'home_shortName': home_shortName,
-                'home_score': home_score,
-                'away_id': away_id,
-                'away_shortName': away_shortName,
-                'away_score': away_score
+                'home_id': event['homeTeam']['id'],
+                'home_shortName': event['homeTeam']['shortName'],
+                'home_score': event.get('homeScore', {}).get('display', ),
+                'away_id': event['awayTeam']['id'],
+                'away_shortName': event['awayTeam']['shortName'],
+                'away_score': event.get('awayScore', {}).get('display', ),
+                'status': event.get('status', {}).get('type')
             }
 
             events.append(event_dic)
@@ -1070,13 +829,122 @@ def get_total_event_from_season(league_id, season_id, rounds, delay=5):
     # Convert the events list to a pandas DataFrame
     events_df = pd.DataFrame(events)
 
+    if completed_rounds:
+        kept = existing[existing['round_number'].isin(completed_rounds)]
+        events_df = pd.concat([kept, events_df], ignore_index=True)
+        events_df = events_df.sort_values('round_number', kind='stable', ignore_index=True)
+
     # Export to CSV
-    os.makedirs('data', exist_ok=True)
-    events_df.to_csv('data/sofascore_events_total.csv', index=False, encoding='utf-8')
+    write_table(events_df, 'data/sofascore_events_total.csv')
 
     return events_df
 
 
+def iter_momentum(events, batch_size=1, delay=0, max_workers=4):
+    """
+    Streams the momentum data of a list of events as it arrives, e.g.
+    write_stream(iter_momentum(events), 'data/sofascore_momentum.csv').
+
+    Args:
+        events (list): List of event IDs to fetch momentum data for.
+        batch_size (int): Number of events combined in each yielded DataFrame. Default is 1.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+
+    Yields:
+        pd.DataFrame: Momentum data of up to batch_size events.
+    """
+    return iter_batch(get_momentum, events, 'momentum', delay=delay, max_workers=max_workers, batch_size=batch_size)
+
+
+def iter_shotmap(events, batch_size=1, delay=0, max_workers=4):
+    """
+    Streams the shotmap data of a list of events as it arrives.
+
+    Args:
+        events (list): List of event IDs.
+        batch_size (int): Number of events combined in each yielded DataFrame. Default is 1.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+
+    Yields:
+        pd.DataFrame: Shotmap data of up to batch_size events.
+    """
+    return iter_batch(get_shotmap, events, 'shotmap', delay=delay, max_workers=max_workers, batch_size=batch_size)
+
+
+def iter_incidents(events, batch_size=1, delay=0, max_workers=4):
+    """
+    Streams the incident data of a list of events as it arrives.
+
+    Args:
+        events (list): List of event IDs.
+        batch_size (int): Number of events combined in each yielded DataFrame. Default is 1.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+
+    Yields:
+        pd.DataFrame: Incident data of up to batch_size events.
+    """
+    return iter_batch(get_incidents, events, 'incidents', delay=delay, max_workers=max_workers, batch_size=batch_size)
+
+
+def iter_highlights(events, batch_size=1, delay=0, max_workers=4):
+    """
+    Streams the highlights of a list of events as they arrive.
+
+    Args:
+        events (list): List of event IDs.
+        batch_size (int): Number of events combined in each yielded DataFrame. Default is 1.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+
+    Yields:
+        pd.DataFrame: Highlights of up to batch_size events.
+    """
+    return iter_batch(lambda event_id: get_highlights(event_id, records=True), events, 'highlights', delay=delay, max_workers=max_workers, batch_size=batch_size)
+
+
+def iter_event_statistics(events, batch_size=1, delay=0, max_workers=4):
+    """
+    Streams the statistics of a list of events as they arrive.
+
+    Args:
+        events (list): List of event IDs.
+        batch_size (int): Number of events combined in each yielded DataFrame. Default is 1.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+
+    Yields:
+        pd.DataFrame: Statistics of up to batch_size events.
+    """
+    return iter_batch(lambda event_id: get_event_statistics(event_id, records=True), events, 'event statistics', delay=delay, max_workers=max_workers, batch_size=batch_size)
+
+
+def iter_heatmap(players, batch_size=1, delay=0, max_workers=4, league_ids=None, season_ids=None):
+    """
+    Streams the heatmaps of a list of players as they arrive.
+
+    Args:
+        players (list of dict): List of player dictionaries with 'id'.
+        batch_size (int): Number of players combined in each yielded DataFrame. Default is 1.
+        delay (int): Extra delay in seconds between API requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of players fetched at the same time. Default is 4.
+        league_ids (list, optional): Only fetch the heatmaps of these leagues. Defaults to every league.
+        season_ids (list, optional): Only fetch the heatmaps of these seasons. Defaults to every season.
+
+    Yields:
+        pd.DataFrame: Heatmap data of up to batch_size players, for all their tournaments.
+    """
+    fetch_heatmaps = lambda player: get_player_heatmaps(player['id'], league_ids, season_ids)
+    try:
+        yield from iter_batch(fetch_heatmaps, players, 'heatmap', item_id=lambda player: player['id'],
+                              item_name='player', delay=delay, max_workers=max_workers, batch_size=batch_size)
+    finally:
+        # Keep the discovered tournaments for the next runs
+        get_player_tournament_index().save()
+
+
 # Support functions
 
 
@@ -1138,6 +1006,90 @@ def determine_position(order, def_count, mid_0_count, mid_1_count, mid_2_count,
     return line, lat, pos
 
 
+def parse_formation(formation):
+    """
+    Splits a formation string into the number of players of each line.
+
+    Args:
+        formation (str): Team formation, e.g. '4-3-3' or '4-2-3-1'.
+
+    Returns:
+        tuple: (def_count, mid_0_count, mid_1_count, mid_2_count, ata_count)
+    """
+    groups = formation.split('-')
+    def_count = int(groups[0])
+    ata_count = int(groups[-1])
+
+    # Four lines have two midfield groups, otherwise the single midfield goes in the middle
+    if len(groups) == 4:
+        return def_count, int(groups[1]), 0, int(groups[2]), ata_count
+    return def_count, 0, int(groups[1]), 0, ata_count
+
+
+def get_formation_slots(formation):
+    """
+    Returns the line, latitude and position of every starting order of a formation, built once
+    per formation from determine_position.
+
+    Args:
+        formation (str): Team formation, e.g. '4-3-3' or '4-2-3-1'.
+
+    Returns:
+        pd.DataFrame: One row per starting order, indexed by order, with the 'line', 'lat' and 'pos' columns.
+    """
+    if formation not in _formation_slots:
+        counts = parse_formation(formation)
+        orders = range(1, max(11, 1 + sum(counts)) + 1)
+        slots = [determine_position(order, *counts, substitute=False) for order in orders]
+        _formation_slots[formation] = pd.DataFrame(slots, index=orders, columns=['line', 'lat', 'pos'])
+    return _formation_slots[formation]
+
+
+_formation_slots = {}
+
+
+def assign_positions(lineup_df):
+    """
+    Computes the 'line', 'lat' and 'pos' columns of a whole batch of lineups at once, with a
+    lookup per formation instead of calling determine_position for every player.
+
+    Args:
+        lineup_df (pd.DataFrame): Lineup rows with the 'formation', 'order' and 'substitute' columns.
+
+    Returns:
+        pd.DataFrame: The lineup with 'line', 'lat' and 'pos', added after 'order' if they are missing.
+    """
+    lineup_df = lineup_df.copy()
+
+    # Lookup table of every formation of the batch, one row per formation and one column per order
+    codes, formations = pd.factorize(lineup_df['formation'].astype(str))
+    tables = [get_formation_slots(formation) for formation in formations]
+    width = max([len(table) for table in tables], default=0) + 2  # Orders start at 1, and the last column stays empty
+    lookup = {column: np.full((len(tables), width), None, dtype=object) for column in ['line', 'lat', 'pos']}
+    for row, table in enumerate(tables):
+        for column in lookup:
+            lookup[column][row, table.index] = table[column].to_numpy(dtype=object)
+
+    # Orders beyond the table fall on its last column, which is always empty
+    orders = np.clip(lineup_df['order'].to_numpy(dtype=int), 0, width - 1)
+    values = {column: table[codes, orders] for column, table in lookup.items()}
+
+    # Players outside the starting orders are substitutes or reserves
+    bench = (lineup_df['order'].to_numpy() > 11) & pd.isna(values['pos'])
+    bench_pos = np.where(lineup_df['substitute'].astype(bool).to_numpy(), 'SUS', 'RES')
+    values['pos'] = np.where(bench, bench_pos, values['pos'])
+
+    at = lineup_df.columns.get_loc('order') + 1
+    for column, column_values in values.items():
+        if column in lineup_df.columns:
+            lineup_df[column] = column_values
+        else:
+            lineup_df.insert(at, column, column_values)
+        at = lineup_df.columns.get_loc(column) + 1
+
+    return lineup_df
+
+
 def create_team_df(players, formation, def_count, mid_0_count, mid_1_count, mid_2_count, ata_count, team_name, is_home):
     """
     Creates a DataFrame for a team based on players' data and formation.
@@ -1166,13 +1118,12 @@ def create_team_df(players, formation, def_count, mid_0_count, mid_1_count, mid_
         minutes = player.get('statistics', {}).get('minutesPlayed', 0)
         
         order = j + 1
-        line, lat, pos = determine_position(order, def_count, mid_0_count, mid_1_count, mid_2_count, ata_count, substitute)
+        team_data.append([name, id, jersey, position, substitute, minutes, order])
 
-        team_data.append([name, id, jersey, position, substitute, minutes, order, line, lat, pos])
-
-    df = pd.DataFrame(team_data, columns=['player', 'id', 'jersey', 'position', 'substitute', 'minutes', 'order', 'line', 'lat', 'pos'])
+    df = pd.DataFrame(team_data, columns=['player', 'id', 'jersey', 'position', 'substitute', 'minutes', 'order'])
     df['team'] = team_name
     df['formation'] = formation
+    df = assign_positions(df)
     df['defense'] = def_count
     df['midfield'] = mid_0_count + mid_1_count + mid_2_count
     df['attack'] = ata_count
@@ -1181,191 +1132,2771 @@ def create_team_df(players, formation, def_count, mid_0_count, mid_1_count, mid_
     return df
 
 
-def get_lineups(event_id):
+def get_event_lineup(event_id):
     """
-    Retrieves the lineups for a given event from Sofascore.
+    Fetches the lineups and average positions of a finished event and combines them.
 
-    Parameters:
+    Args:
         event_id (int): The unique identifier for the event.
 
     Returns:
-        dict: The JSON response containing lineup information.
+        pd.DataFrame: Lineup data and average positions of both teams, or None if the event is not finished.
     """
-    api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/lineups'
-    data = request_to_json(api_url)
-    return data
+    data = get_event_data(event_id)
+    if data['event']['status']['type'] != 'finished':
+        return None
 
+    return parse_event_lineup(event_id, data, get_lineups(event_id), get_average_positions(event_id))
 
-def get_average_positions(event_id):
+
+def parse_event_lineup(event_id, event_data, lineups, average_positions):
+    """
+    Builds the lineup of both teams of an event in a single pass, joining each player with their
+    average position by player ID.
+
+    Args:
+        event_id (int): The unique identifier for the event.
+        event_data (dict): The event data, as returned by get_event_data.
+        lineups (dict): The lineups, as returned by get_lineups.
+        average_positions (dict): The average positions, as returned by get_average_positions.
+
+    Returns:
+        pd.DataFrame: One row per player with their lineup data, position and average position.
+    """
+    # Average positions of both teams, indexed by player ID
+    averages = {
+        average['player']['id']: average
+        for side in ('home', 'away')
+        for average in (average_positions or {}).get(side, [])
+    }
+
+    rows = []
+    for side, local in (('home', 'Home'), ('away', 'Away')):
+        formation = lineups[side]['formation']
+        def_count, mid_0_count, mid_1_count, mid_2_count, ata_count = parse_formation(formation)
+        team = event_data['event'][f'{side}Team']['shortName']
+
+        for j, player in enumerate(lineups[side]['players']):
+            average = averages.get(player['player']['id'], {})
+            rows.append({
+                'player': player['player']['name'],
+                'id': player['player']['id'],
+                'jersey': player['shirtNumber'],
+                'position': player.get('position', ''),
+                'substitute': player['substitute'],
+                'minutes': player.get('statistics', {}).get('minutesPlayed', 0),
+                'order': j + 1,
+                'local': local,
+                'team': team,
+                'formation': formation,
+                'defense': def_count,
+                'midfield': mid_0_count + mid_1_count + mid_2_count,
+                'attack': ata_count,
+                'averageX': average.get('averageX'),
+                'averageY': average.get('averageY'),
+                'pointsCount': average.get('pointsCount'),
+                'event_id': int(event_id),
+            })
+
+    # Line, latitude and position of every player of both teams at once
+    return assign_positions(pd.DataFrame(rows))
+
+
+def get_lineups(event_id):
+    """
+    Retrieves the lineups for a given event from Sofascore.
+
+    Parameters:
+        event_id (int): The unique identifier for the event.
+
+    Returns:
+        dict: The JSON response containing lineup information.
+    """
+    api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/lineups'
+    data = request_to_json(api_url)
+    return data
+
+
+def get_average_positions(event_id):
     """
     Retrieves the average positions for players in a given event from Sofascore.
 
-    Parameters:
-        event_id (int): The unique identifier for the event.
+    Parameters:
+        event_id (int): The unique identifier for the event.
+
+    Returns:
+        dict: The JSON response containing average position information.
+    """
+    api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/average-positions'
+    data = request_to_json(api_url)
+    return data
+
+
+def get_event_data(event_id):
+    """
+    Retrieves general data for a given event from Sofascore.
+
+    Parameters:
+        event_id (int): The unique identifier for the event.
+
+    Returns:
+        dict: The JSON response containing event data.
+    """
+    return get_event_repository().get(event_id)
+
+
+class EventRepository:
+    """
+    In-process store of event headers (/event/{id}) shared by every function that needs them,
+    so each event is fetched at most once per run. The least recently used events are dropped
+    once maxsize is reached.
+
+    Args:
+        maxsize (int): Maximum number of events kept in memory. Default is 2048.
+    """
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, event_id):
+        """
+        Returns the data of an event, fetching it from Sofascore only if it is not stored yet.
+
+        Args:
+            event_id (int): The unique identifier for the event.
+
+        Returns:
+            dict: The JSON response containing event data.
+        """
+        data = self.lookup(event_id)
+        if data is not None:
+            return data
+
+        api_url = f'https://www.sofascore.com/api/v1/event/{event_id}'
+        data = request_to_json(api_url)
+        self.put(event_id, data)
+
+        return data
+
+    def lookup(self, event_id):
+        """
+        Returns the data of an event if it is stored, without fetching it.
+
+        Args:
+            event_id (int): The unique identifier for the event.
+
+        Returns:
+            dict: The stored event data, or None.
+        """
+        key = str(event_id)
+        with self._lock:
+            if key in self._events:
+                self._events.move_to_end(key)
+                return self._events[key]
+        return None
+
+    def put(self, event_id, data):
+        """
+        Stores the data of an event fetched elsewhere, e.g. by AsyncClient.
+
+        Args:
+            event_id (int): The unique identifier for the event.
+            data (dict): The JSON response containing event data.
+        """
+        # Failed requests are not stored so they can be retried
+        if data is None or 'event' not in data:
+            return
+
+        key = str(event_id)
+        with self._lock:
+            self._events[key] = data
+            self._events.move_to_end(key)
+            while len(self._events) > self.maxsize:
+                self._events.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes every stored event.
+        """
+        with self._lock:
+            self._events.clear()
+
+
+_event_repository = EventRepository()
+
+
+def get_event_repository():
+    """
+    Returns the event repository shared by the module.
+
+    Returns:
+        EventRepository: The shared event repository.
+    """
+    return _event_repository
+
+
+def parse_html(content, only=None):
+    """
+    Parses an HTML page with lxml when it is installed, which is several times faster than the
+    built-in parser, and falls back to 'html.parser' otherwise.
+
+    Args:
+        content (str or bytes): The HTML page.
+        only (bs4.SoupStrainer, optional): Restricts parsing to the matching tags, skipping the rest of the page.
+
+    Returns:
+        bs4.BeautifulSoup: The parsed page.
+    """
+    global _html_parser
+    if _html_parser is None:
+        _html_parser = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+    return bs4.BeautifulSoup(content, _html_parser, parse_only=only)
+
+
+_html_parser = None
+
+
+def get_html_links(content):
+    """
+    Extracts the href of every link of an HTML page, parsing only its <a> tags.
+
+    Args:
+        content (str or bytes): The HTML page.
+
+    Returns:
+        list: The href of each <a> tag, in page order.
+    """
+    soup = parse_html(content, bs4.SoupStrainer('a', href=True))
+    return [link['href'] for link in soup.find_all('a', href=True)]
+
+
+def get_tournament_standing(tournament_id, season_id):
+    """
+    Fetches the standings of a specific tournament and season from Sofascore.
+
+    Args:
+        tournament_id (str): The unique identifier for the tournament.
+        season_id (str): The unique identifier for the season.
+
+    Returns:
+        dict: A dictionary containing league, country, season, team names, and team IDs.
+    """
+    api_url = f'https://www.sofascore.com/api/v1/unique-tournament/{tournament_id}/season/{season_id}/standings/total'
+
+    try:
+        data = request_to_json(api_url)
+
+        league = data['standings'][0]['tournament']['name']
+        country = data['standings'][0]['tournament']['category']['name']
+        season = datetime.fromtimestamp(data['standings'][0]['updatedAtTimestamp']).year
+
+        teams_name = [row['team']['name'] for row in data['standings'][0]['rows']]
+        teams_id = [row['team']['id'] for row in data['standings'][0]['rows']]
+
+        return {
+            'league': league,
+            'country': country,
+            'season': season,
+            'teams_name': teams_name,
+            'teams_id': teams_id
+        }
+
+    except SofascoreRequestError as e:
+        print(f'Error fetching tournament standings: {e}')
+        return None
+    
+
+def get_player_tournaments(player_id):
+    """
+    Fetches the tournaments and seasons a player has participated in from the Sofascore API.
+
+    Args:
+        player_id (int): The unique identifier for the player in Sofascore.
+
+    Returns:
+        DataFrame: A pandas DataFrame containing tournament and season information for the player.
+    """
+    
+    tournaments = []
+    api_url = f'https://www.sofascore.com/api/v1/player/{player_id}/statistics/seasons'
+    
+    data = request_to_json(api_url)
+
+    current_year = str(datetime.now().year)
+    
+    # Loop through each tournament and its seasons in the JSON data
+    for tournament in data['uniqueTournamentSeasons']:
+        for season in tournament['seasons']:
+            season_year = int(season['year'][-2:])
+            if season_year > int(current_year[-2:]) - 2:  # Only include seasons from the last two years
+                competition_name = season['name']
+                tournaments_id = tournament['uniqueTournament']['id']
+                season_id = season['id']
+                tournaments.append([competition_name, tournaments_id, season_id])
+
+    # Convert the list of tournaments to a pandas DataFrame
+    tournaments_df = pd.DataFrame(tournaments, columns=['competition_name', 'tournaments_id', 'season_id'])
+    tournaments_df['player_id'] = player_id
+    
+    return tournaments_df
+
+
+class PlayerTournamentIndex:
+    """
+    Index of the tournaments and seasons each player took part in (see get_player_tournaments),
+    kept on disk so later runs do not discover them again.
+
+    Args:
+        path (str): CSV file where the index is stored. Default is 'data/player_tournaments.csv'.
+        max_age (float): Days after which a player is discovered again, to pick up new seasons. Default is 7.
+    """
+
+    COLUMNS = ['player_id', 'competition_name', 'tournaments_id', 'season_id', 'fetched_at']
+
+    def __init__(self, path='data/player_tournaments.csv', max_age=7):
+        self.path = path
+        self.max_age = max_age
+        self._players = {}  # Player ID -> (fetched_at, list of (competition_name, tournaments_id, season_id))
+        self._changed = False
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            index = pd.read_csv(path, encoding='utf-8')
+            for player_id, rows in index.groupby(index['player_id'].astype(str), sort=False):
+                # Players without tournaments are stored as a single row with no tournament
+                tournaments = [
+                    (row.competition_name, int(row.tournaments_id), int(row.season_id))
+                    for row in rows.dropna(subset=['tournaments_id']).itertuples()
+                ]
+                self._players[player_id] = (float(rows['fetched_at'].iloc[0]), tournaments)
+
+    def get(self, player_id):
+        """
+        Returns the tournaments of a player, discovering them only if they are missing or too old.
+
+        Args:
+            player_id (int): The unique identifier for the player in Sofascore.
+
+        Returns:
+            DataFrame: Same columns as get_player_tournaments.
+        """
+        key = str(player_id)
+        with self._lock:
+            entry = self._players.get(key)
+
+        if entry is None or time.time() - entry[0] > self.max_age * 86400:
+            discovered = get_player_tournaments(player_id)
+            tournaments = list(discovered[['competition_name', 'tournaments_id', 'season_id']].itertuples(index=False, name=None))
+            with self._lock:
+                self._players[key] = (time.time(), tournaments)
+                self._changed = True
+        else:
+            tournaments = entry[1]
+
+        tournaments_df = pd.DataFrame(tournaments, columns=['competition_name', 'tournaments_id', 'season_id'])
+        tournaments_df['player_id'] = player_id
+        return tournaments_df
+
+    def save(self):
+        """
+        Writes the index to disk if players were discovered since it was loaded or last saved.
+        """
+        rows = []
+        with self._lock:
+            if not self._changed:
+                return
+            for player_id, (fetched_at, tournaments) in self._players.items():
+                if not tournaments:
+                    rows.append([player_id, None, None, None, fetched_at])
+                for competition_name, tournaments_id, season_id in tournaments:
+                    rows.append([player_id, competition_name, tournaments_id, season_id, fetched_at])
+            self._changed = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f'{self.path}.tmp'
+        index = pd.DataFrame(rows, columns=self.COLUMNS).astype({'tournaments_id': 'Int64', 'season_id': 'Int64'})
+        index.to_csv(tmp_path, index=False, encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+
+_player_tournament_index = None
+_player_tournament_index_lock = threading.Lock()
+
+
+def get_player_tournament_index():
+    """
+    Returns the player tournament index shared by the module, loading it from disk on first use.
+
+    Returns:
+        PlayerTournamentIndex: The shared index.
+    """
+    global _player_tournament_index
+    with _player_tournament_index_lock:
+        if _player_tournament_index is None:
+            _player_tournament_index = PlayerTournamentIndex()
+        return _player_tournament_index
+
+
+def get_heatmap(player_id, league_id, season_id, data=None):
+    """
+    Fetches heatmap data for a player from a specific league and season from the Sofascore API.
+
+    Args:
+        player_id (int): Player's unique identifier in Sofascore.
+        league_id (int): League's unique identifier in Sofascore.
+        season_id (int): Season's unique identifier in Sofascore.
+        data (dict, optional): Response already fetched, e.g. by AsyncClient. Fetched here by default.
+
+    Returns:
+        DataFrame: Contains heatmap data with coordinates (x, y) and count of actions.
+    """
+    
+    heatmap = []
+    api_url = f'https://www.sofascore.com/api/v1/player/{player_id}/unique-tournament/{league_id}/season/{season_id}/heatmap/overall'
+    
+    try:
+        if data is None:
+            data = request_to_json(api_url)
+    except SofascoreRequestError as e:
+        # Only a definitive answer, e.g. a 404, means there is no heatmap; other failures are retried later
+        if e.retryable:
+            raise
+        return pd.DataFrame(columns=['x', 'y', 'count', 'player_id', 'league_id', 'season_id'])
+
+    if 'points' in data:
+        for point in data['points']:
+            x = point.get('x', 0)
+            y = point.get('y', 0)
+            count = point.get('count', 0)
+            heatmap.append([x, y, count])
+    else:
+        print(f"No heatmap data found for player {player_id} in league {league_id} and season {season_id}.")
+
+    heatmap_df = pd.DataFrame(heatmap, columns=['x', 'y', 'count'])
+    heatmap_df['player_id'] = player_id
+    heatmap_df['league_id'] = league_id
+    heatmap_df['season_id'] = season_id
+    
+    return heatmap_df
+
+
+def get_player_heatmaps(player_id, league_ids=None, season_ids=None):
+    """
+    Fetches the heatmaps of a player in every tournament and season they played.
+
+    Args:
+        player_id (int): Player's unique identifier in Sofascore.
+        league_ids (list, optional): Only fetch the heatmaps of these leagues. Defaults to every league.
+        season_ids (list, optional): Only fetch the heatmaps of these seasons. Defaults to every season.
+
+    Returns:
+        DataFrame: Combined heatmap data for all the player's tournaments, or None if there is none.
+    """
+    dfs = []
+
+    # Get tournaments for the current player, discovered once and kept in the index across runs
+    tournaments = get_player_tournament_index().get(player_id)
+    if league_ids is not None:
+        tournaments = tournaments[tournaments['tournaments_id'].isin([int(i) for i in league_ids])]
+    if season_ids is not None:
+        tournaments = tournaments[tournaments['season_id'].isin([int(i) for i in season_ids])]
+
+    # Loop through each tournament
+    for _, row in tournaments.iterrows():
+        league_id = row['tournaments_id']
+        season_id = row['season_id']
+
+        # Get heatmap for the current player, league, and season. A failed request fails the whole
+        # player, so it is kept as a dead letter instead of being saved with missing tournaments
+        heatmap_tournament = get_heatmap(player_id, league_id, season_id)
+        dfs.append(heatmap_tournament)
+
+    return pd.concat(dfs, ignore_index=True) if dfs else None
+
+
+HEATMAP_GRID_SHAPE = (100, 100)  # (rows along y, columns along x) covering Sofascore's 0-100 pitch coordinates
+
+
+def heatmap_to_grids(heatmap_df, shape=HEATMAP_GRID_SHAPE):
+    """
+    Bins the long heatmap table (one row per point) into one dense pitch grid per player, league
+    and season, which takes a fraction of the memory and disk of the repeated IDs.
+
+    Args:
+        heatmap_df (pd.DataFrame): Heatmap data as returned by get_heatmap_from_players.
+        shape (tuple): Number of (rows, columns) of the grid. Default is HEATMAP_GRID_SHAPE.
+
+    Returns:
+        tuple: (keys, grids) with a DataFrame of player_id, league_id and season_id, and an int32 array of
+            shape (len(keys), rows, columns) holding the action counts of each key.
+    """
+    key_columns = ['player_id', 'league_id', 'season_id']
+    keys = heatmap_df[key_columns].drop_duplicates().reset_index(drop=True)
+    rows, columns = shape
+    grids = np.zeros((len(keys), rows, columns), dtype=np.int32)
+    if heatmap_df.empty:
+        return keys, grids
+
+    # Group numbers follow the order of first appearance, like drop_duplicates
+    codes = heatmap_df.groupby(key_columns, sort=False).ngroup().to_numpy()
+    y = np.clip((heatmap_df['y'].to_numpy(dtype=float) * rows / 100).astype(int), 0, rows - 1)
+    x = np.clip((heatmap_df['x'].to_numpy(dtype=float) * columns / 100).astype(int), 0, columns - 1)
+    np.add.at(grids, (codes, y, x), heatmap_df['count'].to_numpy(dtype=np.int32))
+
+    return keys, grids
+
+
+def save_heatmap_grids(keys, grids, path='data/sofascore_heatmap.npz'):
+    """
+    Saves heatmap grids as a compressed NumPy archive, through a temporary file.
+
+    Args:
+        keys (pd.DataFrame): player_id, league_id and season_id of each grid, as returned by heatmap_to_grids.
+        grids (np.ndarray): The grids, as returned by heatmap_to_grids.
+        path (str): Path of the archive. Default is 'data/sofascore_heatmap.npz'.
+
+    Returns:
+        str: The path the grids were written to.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, grids=grids, **{column: pd.to_numeric(keys[column]).to_numpy(dtype=np.int64) for column in keys.columns})
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def load_heatmap_grids(path='data/sofascore_heatmap.npz'):
+    """
+    Loads heatmap grids saved by save_heatmap_grids.
+
+    Args:
+        path (str): Path of the archive. Default is 'data/sofascore_heatmap.npz'.
+
+    Returns:
+        tuple: (keys, grids) as returned by heatmap_to_grids.
+    """
+    with np.load(path) as archive:
+        keys = pd.DataFrame({column: archive[column] for column in ['player_id', 'league_id', 'season_id']})
+        grids = archive['grids']
+
+    return keys, grids
+
+
+def aggregate_heatmap_grids(keys, grids, groups):
+    """
+    Sums the heatmap grids of the players of each group, e.g. a team or a position, in one pass.
+
+    Args:
+        keys (pd.DataFrame): player_id, league_id and season_id of each grid, as returned by heatmap_to_grids.
+        grids (np.ndarray): The grids, as returned by heatmap_to_grids.
+        groups (dict or pd.Series): Group of each player ID, e.g. {941083: 'River'}. Players without a group are left out.
+
+    Returns:
+        tuple: (labels, totals) with the group labels and an array with the summed grid of each of them.
+    """
+    mapping = pd.Series(groups)
+    mapping.index = mapping.index.astype(str)
+    labels = keys['player_id'].astype(str).map(mapping)
+
+    codes, uniques = pd.factorize(labels)  # Players without a group get -1
+    selected = codes >= 0
+    totals = np.zeros((len(uniques),) + grids.shape[1:], dtype=np.int64)
+    np.add.at(totals, codes[selected], grids[selected])
+
+    return list(uniques), totals
+
+
+class HTTPTransport:
+    """
+    Keeps a bounded pool of persistent (keep-alive) connections to the Sofascore API.
+
+    Args:
+        host (str): Host to connect to. Default is 'api.sofascore.com'.
+        port (int, optional): Port to connect to. Defaults to the standard port of the scheme.
+        https (bool): Whether to use HTTPS. Set it to False to target a local fake server.
+        max_connections (int): Maximum number of connections open at the same time. Default is 8.
+        timeout (float): Socket timeout in seconds. Default is 30 seconds.
+    """
+
+    def __init__(self, host='api.sofascore.com', port=None, https=True, max_connections=8, timeout=30):
+        self.host = host
+        self.port = port
+        self.https = https
+        self.timeout = timeout
+        self._idle = []  # Connections ready to be reused
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def get(self, api_url, headers=None):
+        """
+        Performs a GET request reusing an idle connection when one is available.
+
+        Args:
+            api_url (str): Full URL or path of the endpoint. Only the path and query are sent.
+            headers (dict, optional): Extra request headers.
+
+        Returns:
+            tuple: (status, headers, body) with the status code, a dict of response headers and the raw body.
+        """
+        parts = urlsplit(api_url)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+
+        with self._slots:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+
+            # A pooled connection may have been closed by the server, so it gets one retry on a fresh one
+            attempts = 2 if connection is not None else 1
+            for attempt in range(attempts):
+                if connection is None:
+                    connection = self._connect()
+                try:
+                    connection.request('GET', path, headers=headers or {})
+                    response = connection.getresponse()
+                    body = response.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    connection.close()
+                    connection = None
+                    if attempt == attempts - 1:
+                        raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+
+        return response.status, dict(response.getheaders()), body
+
+    def close(self):
+        """
+        Closes every idle connection in the pool.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Returns the transport shared by every request to the Sofascore API, creating it on first use.
+
+    Returns:
+        HTTPTransport: The shared transport.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HTTPTransport()
+        return _transport
+
+
+def set_transport(transport):
+    """
+    Replaces the transport shared by every request to the Sofascore API.
+
+    Useful to tune the pool size or to point the module to a local fake server, e.g.
+    set_transport(HTTPTransport('127.0.0.1', 8000, https=False)).
+
+    Args:
+        transport (HTTPTransport): Any object with a get(api_url) method returning (status, headers, body).
+
+    Returns:
+        HTTPTransport: The previous transport, or None if none had been created.
+    """
+    global _transport
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    if previous is not None and previous is not transport and hasattr(previous, 'close'):
+        previous.close()
+    return previous
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every request sent to Sofascore.
+
+    Args:
+        rate (float): Requests allowed per second on average. Default is 1.
+        burst (int): Requests that can be sent back to back after an idle period. Default is 3.
+    """
+
+    def __init__(self, rate=1.0, burst=3):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until the next request is allowed to go out.
+
+        Returns:
+            float: Time spent waiting, in seconds.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """
+        Waits without blocking the event loop until the next request is allowed to go out. Sync and
+        async requests draw from the same bucket.
+
+        Returns:
+            float: Time spent waiting, in seconds.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Take the token now, even if it goes negative, so concurrent callers queue up in order
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+
+_rate_limiter = RateLimiter()
+
+
+def get_rate_limiter():
+    """
+    Returns the rate limiter shared by every request sent to Sofascore.
+
+    Returns:
+        RateLimiter: The shared rate limiter.
+    """
+    return _rate_limiter
+
+
+def set_rate_limit(rate, burst=None):
+    """
+    Replaces the shared rate limiter.
+
+    Args:
+        rate (float): Requests allowed per second on average.
+        burst (int, optional): Requests that can be sent back to back after an idle period. Defaults to the current burst.
+
+    Returns:
+        RateLimiter: The new shared rate limiter.
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rate, _rate_limiter.burst if burst is None else burst)
+    return _rate_limiter
+
+
+class SofascoreRequestError(Exception):
+    """
+    Raised by request_to_json when a request cannot be completed, after the retries allowed by the retry policy.
+
+    Args:
+        message (str): Description of the failure.
+        url (str): URL of the request.
+        status (int, optional): Status code of the last response, or None if no response was received.
+        retryable (bool): Whether the request may succeed later, e.g. after a 503. Default is True.
+    """
+
+    def __init__(self, message, url, status=None, retryable=True):
+        super().__init__(message)
+        self.url = url
+        self.status = status
+        self.retryable = retryable
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests after too many consecutive failures, so a down or blocking API fails
+    fast instead of making every worker wait through its retries. After the cooldown one request
+    is let through, and the circuit closes again if it succeeds.
+
+    Args:
+        threshold (int): Consecutive failures that open the circuit. Default is 10.
+        cooldown (float): Time in seconds the circuit stays open. Default is 60 seconds.
+    """
+
+    def __init__(self, threshold=10, cooldown=60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened = None  # Time the circuit was opened, None while closed
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Returns whether a request can go out now.
+        """
+        with self._lock:
+            if self._opened is None:
+                return True
+            if time.monotonic() - self._opened < self.cooldown:
+                return False
+
+            # Half open: let this request through and keep the others waiting for its outcome
+            self._opened = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._opened = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Decides which failed requests are retried and how long to wait before each retry.
+
+    Waits grow exponentially from backoff up to max_backoff, with full jitter so workers that
+    failed together do not retry together. A Retry-After header sent with a 429 or 503 takes
+    precedence and is always waited in full. A request asked to wait longer than max_backoff fails
+    right away instead, so the item can be retried later with retry_failed_items.
+
+    Args:
+        max_attempts (int): Maximum number of attempts per request, including the first one. Default is 4.
+        backoff (float): Base wait in seconds before the first retry. Default is 0.5 seconds.
+        max_backoff (float): Maximum wait in seconds before a retry, including Retry-After. Default is 30 seconds.
+        retry_statuses (tuple): Status codes worth retrying. Default is 429 and the transient 5xx codes.
+        breaker (CircuitBreaker, optional): Circuit breaker shared by every request. Defaults to a new one.
+    """
+
+    def __init__(self, max_attempts=4, backoff=0.5, max_backoff=30, retry_statuses=(429, 500, 502, 503, 504),
+                 breaker=None):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = set(retry_statuses)
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    def delay(self, attempt, headers=None):
+        """
+        Returns the time to wait before retrying a request.
+
+        Args:
+            attempt (int): Number of attempts already made.
+            headers (dict, optional): Headers of the failed response.
+
+        Returns:
+            float: Time to wait, in seconds. It is over max_backoff only when the server asked for it with Retry-After.
+        """
+        retry_after = get_retry_after(headers)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+
+def get_retry_after(headers):
+    """
+    Reads the Retry-After header of a response, given either in seconds or as an HTTP date.
+
+    Args:
+        headers (dict): Response headers.
+
+    Returns:
+        float: Time to wait in seconds, or None if the header is missing or invalid.
+    """
+    value = next((v for k, v in (headers or {}).items() if k.lower() == 'retry-after'), None)
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_retry_policy = RetryPolicy()
+
+
+def get_retry_policy():
+    """
+    Returns the retry policy used by every request sent to Sofascore.
+
+    Returns:
+        RetryPolicy: The shared retry policy.
+    """
+    return _retry_policy
+
+
+def set_retry_policy(policy):
+    """
+    Replaces the retry policy used by every request sent to Sofascore, e.g. set_retry_policy(RetryPolicy(max_attempts=6)).
+
+    Args:
+        policy (RetryPolicy): The new retry policy.
+
+    Returns:
+        RetryPolicy: The previous retry policy.
+    """
+    global _retry_policy
+    previous, _retry_policy = _retry_policy, policy
+    return previous
+
+
+DEFAULT_CACHE_TTLS = {
+    r'/event/\d+$': 10 * 60,  # Event header, changes while the match is live
+    r'/event/\d+/': 60 * 60,  # Lineups, shotmap, incidents, graph, statistics...
+    r'/events/round/': 60 * 60,
+    r'/standings/': 6 * 60 * 60,
+    r'/player/\d+': 24 * 60 * 60,
+    r'/team/\d+': 24 * 60 * 60,
+    r'.': 60 * 60,
+}
+
+
+class ResponseCache:
+    """
+    Persistent cache of Sofascore API responses stored as compressed JSON in a SQLite database.
+
+    Responses expire after a TTL that depends on the endpoint. Responses of an event fetched after
+    it ended never expire, since they can no longer change, whichever order the event header and
+    the responses are fetched in. When the stored responses grow past max_size, the least recently
+    used ones are evicted.
+
+    Args:
+        path (str): Path of the SQLite database. Default is 'data/cache.sqlite'.
+        ttls (dict, optional): Regular expressions searched in the URL mapped to TTLs in seconds.
+            The first matching pattern wins. Defaults to DEFAULT_CACHE_TTLS.
+        max_size (int): Maximum total size of the stored responses, in bytes. Default is 512 MB.
+    """
+
+    def __init__(self, path='data/cache.sqlite', ttls=None, max_size=512 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls or DEFAULT_CACHE_TTLS).items()]
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                event_id INTEGER,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+            CREATE TABLE IF NOT EXISTS finished_events (
+                event_id INTEGER PRIMARY KEY,
+                finished_at REAL NOT NULL  -- Estimated end of the event, responses fetched later never expire
+            );
+        """)
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _ttl(self, api_url):
+        for pattern, ttl in self.ttls:
+            if pattern.search(api_url):
+                return ttl
+        return 0
+
+    def get(self, api_url):
+        """
+        Returns the cached response of an endpoint if it is still valid.
+
+        Args:
+            api_url (str): URL of the endpoint.
+
+        Returns:
+            dict: The parsed JSON response, or None if it is not cached or has expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("""
+                SELECT r.body, r.fetched_at, f.finished_at
+                FROM responses r LEFT JOIN finished_events f ON f.event_id = r.event_id
+                WHERE r.url = ?
+            """, (api_url,)).fetchone()
+            if row is None:
+                return None
+
+            body, fetched_at, finished_at = row
+
+            # Responses fetched after the event finished are immutable
+            immutable = finished_at is not None and fetched_at >= finished_at
+            if not immutable and now - fetched_at > self._ttl(api_url):
+                return None
+
+            self._db.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, api_url))
+            self._db.commit()
+
+        return json.loads(zlib.decompress(body))
+
+    def set(self, api_url, data):
+        """
+        Stores the response of an endpoint, evicting the least recently used ones if needed.
+
+        Args:
+            api_url (str): URL of the endpoint.
+            data (dict): Parsed JSON response.
+        """
+        now = time.time()
+        body = zlib.compress(json.dumps(data).encode('utf-8'))
+        event = re.search(r'/event/(\d+)', api_url)
+        event_id = int(event.group(1)) if event else None
+
+        # Remember events seen as finished, from then on their responses never expire
+        if event and api_url.rstrip('/').endswith(f'/event/{event_id}'):
+            self.record_event(event_id, data)
+
+        with self._lock:
+            previous = self._db.execute('SELECT size FROM responses WHERE url = ?', (api_url,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                             (api_url, body, len(body), event_id, now, now))
+            self._size += len(body) - (previous[0] if previous else 0)
+
+            # Evict the least recently used responses until the cache fits again
+            while self._size > self.max_size:
+                rows = self._db.execute('SELECT url, size FROM responses ORDER BY accessed_at LIMIT 100').fetchall()
+                for url, size in rows:
+                    self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+                    self._size -= size
+                    if self._size <= self.max_size:
+                        break
+
+            self._db.commit()
+
+    def record_event(self, event_id, data):
+        """
+        Records that an event has finished, given its header, so every response of the event fetched
+        after it ended never expires, including the ones cached before the header was seen.
+
+        Args:
+            event_id (int): The unique identifier for the event.
+            data (dict): The event header, as returned by get_event_data.
+        """
+        event = (data or {}).get('event') or {}
+        if event.get('status', {}).get('type') != 'finished':
+            return
+
+        # The match ended at most an hour after its last period started, or a few hours after kick-off
+        ended_at = time.time()
+        last_period = (event.get('time') or {}).get('currentPeriodStartTimestamp')
+        if last_period:
+            ended_at = min(ended_at, last_period + 60 * 60)
+        elif event.get('startTimestamp'):
+            ended_at = min(ended_at, event['startTimestamp'] + 4 * 60 * 60)
+
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO finished_events VALUES (?, ?)
+                ON CONFLICT (event_id) DO UPDATE SET finished_at = MIN(finished_at, excluded.finished_at)
+            """, (int(event_id), ended_at))
+            self._db.commit()
+
+    def stale_event(self, api_url):
+        """
+        Tells whether an expired response belongs to an event not known to be finished, in which case
+        checking the status of the event may make the response valid again.
+
+        Args:
+            api_url (str): URL of the endpoint, e.g. '.../event/123/graph'.
+
+        Returns:
+            int: The ID of the event, or None.
+        """
+        event = re.search(r'/event/(\d+)/', api_url)
+        if event is None:
+            return None
+
+        with self._lock:
+            row = self._db.execute("""
+                SELECT r.event_id
+                FROM responses r LEFT JOIN finished_events f ON f.event_id = r.event_id
+                WHERE r.url = ? AND f.event_id IS NULL
+            """, (api_url,)).fetchone()
+        return int(event.group(1)) if row is not None else None
+
+    def clear(self):
+        """
+        Removes every cached response.
+        """
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._db.execute('DELETE FROM finished_events')
+            self._db.commit()
+            self._size = 0
+
+    def close(self):
+        """
+        Closes the underlying database.
+        """
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_enabled = True
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the response cache used by request_to_json, creating the default one in
+    'data/cache.sqlite' on first use unless caching was disabled with set_cache(None).
+
+    Returns:
+        ResponseCache: The shared cache, or None if caching is disabled.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None and _cache_enabled:
+            _cache = ResponseCache()
+        return _cache
+
+
+def set_cache(cache):
+    """
+    Sets the response cache used by request_to_json, e.g. set_cache(ResponseCache('other/cache.sqlite')).
+
+    Args:
+        cache (ResponseCache): The cache to use, or None to disable caching.
+
+    Returns:
+        ResponseCache: The previous cache, or None if there was none.
+    """
+    global _cache, _cache_enabled
+    with _cache_lock:
+        previous, _cache = _cache, cache
+        _cache_enabled = cache is not None
+    return previous
+
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Upper bounds in seconds
+
+
+class Metrics:
+    """
+    Thread-safe counters and latency histograms filled by request_to_json, the async client and
+    the drivers, to see where a pull spends its time.
+
+    Counters (all labelled as noted):
+        requests (endpoint, status): Responses received, with status 'error' for network errors.
+        response_bytes (endpoint): Bytes of the response bodies.
+        cache_hits, cache_misses (endpoint): Lookups in the response cache.
+        retries (endpoint): Requests sent again after a failure.
+        rate_limit_wait_seconds, retry_wait_seconds, delay_wait_seconds: Time spent sleeping.
+        parse_seconds (stage): Time spent decoding JSON ('json') and building DataFrames ('frames').
+        items, failed_items (label): Items fetched and failed by the batch drivers.
+        driver_calls, driver_errors, driver_seconds (driver): Calls to the get_*_from_* drivers.
+
+    Histograms:
+        request_seconds (endpoint): Latency of the requests, including the time to read the body.
+
+    Endpoints are the URL paths with the IDs replaced by {id}, e.g. '/event/{id}/graph'.
+
+    Args:
+        buckets (tuple): Upper bounds in seconds of the latency histogram buckets. Default is LATENCY_BUCKETS.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}  # (name, labels) -> value, labels being a tuple of (label, value) pairs
+        self._histograms = {}  # (name, labels) -> [count per bucket + overflow, sum]
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """
+        Adds a value to a counter.
+
+        Args:
+            name (str): Name of the counter, e.g. 'cache_hits'.
+            value (float): Amount to add. Default is 1.
+            **labels: Labels of the counter, e.g. endpoint='/event/{id}'.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Records a duration in a histogram.
+
+        Args:
+            name (str): Name of the histogram, e.g. 'request_seconds'.
+            seconds (float): Duration to record.
+            **labels: Labels of the histogram, e.g. endpoint='/event/{id}'.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+
+    def summary(self):
+        """
+        Returns every counter and histogram as plain data.
+
+        Returns:
+            dict: {'counters': {name: [{**labels, 'value': value}]}, 'histograms': {name: [{**labels, 'count': count,
+            'sum': seconds, 'buckets': {upper bound: cumulative count}}]}}.
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, (list(counts), total)) for key, (counts, total) in self._histograms.items()]
+
+        summary = {'counters': {}, 'histograms': {}}
+        for (name, labels), value in sorted(counters, key=lambda c: (c[0][0], str(c[0][1]))):
+            summary['counters'].setdefault(name, []).append({**dict(labels), 'value': value})
+
+        for (name, labels), (counts, total) in sorted(histograms, key=lambda h: (h[0][0], str(h[0][1]))):
+            cumulative = np.cumsum(counts).tolist()
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            summary['histograms'].setdefault(name, []).append({
+                **dict(labels),
+                'count': cumulative[-1],
+                'sum': total,
+                'buckets': dict(zip(bounds, cumulative)),
+            })
+
+        return summary
+
+    def to_json(self, path=None):
+        """
+        Exports the summary as JSON.
+
+        Args:
+            path (str, optional): File to write the JSON to.
+
+        Returns:
+            str: The summary as JSON.
+        """
+        text = json.dumps(self.summary(), indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, prefix='sofascore'):
+        """
+        Exports the summary in the Prometheus text exposition format, e.g. to be served to a scraper
+        or written for the node exporter's textfile collector.
+
+        Args:
+            prefix (str): Prefix of the metric names. Default is 'sofascore'.
+
+        Returns:
+            str: The metrics in Prometheus text format.
+        """
+        def format_labels(labels):
+            if not labels:
+                return ''
+            pairs = []
+            for k, v in labels.items():
+                value = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                pairs.append(f'{k}="{value}"')
+            return '{' + ','.join(pairs) + '}'
+
+        summary = self.summary()
+        lines = []
+        for name, series in summary['counters'].items():
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            for entry in series:
+                labels = {k: v for k, v in entry.items() if k != 'value'}
+                lines.append(f'{prefix}_{name}_total{format_labels(labels)} {entry["value"]}')
+
+        for name, series in summary['histograms'].items():
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for entry in series:
+                labels = {k: v for k, v in entry.items() if k not in ('count', 'sum', 'buckets')}
+                for bound, count in entry['buckets'].items():
+                    lines.append(f'{prefix}_{name}_bucket{format_labels({**labels, "le": bound})} {count}')
+                lines.append(f'{prefix}_{name}_sum{format_labels(labels)} {entry["sum"]}')
+                lines.append(f'{prefix}_{name}_count{format_labels(labels)} {entry["count"]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def get_endpoint(api_url):
+    """
+    Returns the endpoint of a URL used to label its metrics: its path without the API prefix and with the IDs
+    replaced by {id}, e.g. '/event/{id}/graph'.
+
+    Args:
+        api_url (str): Full URL or path of the request.
+
+    Returns:
+        str: The endpoint.
+    """
+    path = urlsplit(api_url).path
+    if path.startswith('/api/v1'):
+        path = path[len('/api/v1'):]
+    return re.sub(r'/\d+(?=/|$)', '/{id}', path)
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """
+    Returns the metrics filled by every request and driver, e.g. print(get_metrics().to_json()).
+
+    Returns:
+        Metrics: The shared metrics.
+    """
+    return _metrics
+
+
+def set_metrics(metrics):
+    """
+    Replaces the shared metrics, e.g. set_metrics(Metrics()) to start measuring from zero.
+
+    Args:
+        metrics (Metrics): The new metrics.
+
+    Returns:
+        Metrics: The previous metrics.
+    """
+    global _metrics
+    previous, _metrics = _metrics, metrics
+    return previous
+
+
+def fetch_concurrently(func, items, max_workers=4, delay=0):
+    """
+    Applies a fetch function to every item using a bounded pool of threads.
+
+    Every request still goes through the shared rate limiter, which acts as the global
+    rate cap, so max_workers only bounds how many requests can be waiting on the API at once.
+
+    Args:
+        func (callable): Function called with each item.
+        items (iterable): Items to process, e.g. event IDs.
+        max_workers (int): Maximum number of calls running at the same time. Default is 4.
+        delay (int): Extra time to wait (in seconds) before each call. Default is 0 seconds.
+
+    Yields:
+        tuple: (item, result, error) in the same order as items, where error is the exception raised by func or None.
+    """
+    def call(item):
+        if delay:
+            time.sleep(delay)
+            get_metrics().inc('delay_wait_seconds', delay)
+        return func(item)
+
+    def outcome(item, future):
+        try:
+            return item, future.result(), None
+        except Exception as e:
+            return item, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = deque()
+
+        # Keep only a small window of submitted calls so results can be consumed as they arrive
+        for item in items:
+            pending.append((item, executor.submit(call, item)))
+            if len(pending) >= 2 * max(1, max_workers):
+                yield outcome(*pending.popleft())
+
+        while pending:
+            yield outcome(*pending.popleft())
+
+
+def read_existing_output(path):
+    """
+    Reads the previous output of a batch driver.
+
+    Args:
+        path (str): Path of the table written by the driver, with a '.csv' extension.
+
+    Returns:
+        pd.DataFrame: The previous output, or an empty DataFrame if there is none.
+    """
+    if not os.path.exists(get_table_path(path)):
+        return pd.DataFrame()
+    return read_table(path)
+
+
+def get_event_status(event_id):
+    """
+    Retrieves the status of an event, e.g. 'finished' or 'inprogress'.
+
+    Args:
+        event_id (int): The unique identifier for the event.
+
+    Returns:
+        str: The status type of the event, or None if it could not be retrieved.
+    """
+    try:
+        return get_event_data(event_id)['event']['status']['type']
+    except (SofascoreRequestError, KeyError, TypeError):
+        return None
+
+
+def get_known_event_status(event_id):
+    """
+    Returns the status of an event if its header is already in the event repository or the
+    response cache, without sending any request.
+
+    Args:
+        event_id (int): The unique identifier for the event.
+
+    Returns:
+        str: The status type of the event, or None if it is not known.
+    """
+    data = get_event_repository().lookup(event_id)
+    cache = get_cache()
+    if data is None and cache is not None:
+        data = cache.get(f'https://www.sofascore.com/api/v1/event/{event_id}')
+    try:
+        return data['event']['status']['type']
+    except (KeyError, TypeError):
+        return None
+
+
+def read_finished_events(path):
+    """
+    Reads the events a batch driver processed once they were finished, kept in path + '.finished'.
+    Their data can no longer change, so incremental runs do not fetch them again, even the ones
+    that had nothing to store.
+
+    Args:
+        path (str): Path of the output of the driver.
+
+    Returns:
+        set: The event IDs, as strings, or None if the file does not exist.
+    """
+    if not os.path.exists(f'{path}.finished'):
+        return None
+    with open(f'{path}.finished', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def write_finished_events(path, event_ids, append=True):
+    """
+    Records events processed by a batch driver once they were finished, see read_finished_events.
+
+    Args:
+        path (str): Path of the output of the driver.
+        event_ids (iterable): The event IDs.
+        append (bool): If False, the events recorded by previous runs are replaced. Default is True.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f'{path}.finished', 'a' if append else 'w', encoding='utf-8') as f:
+        f.writelines(f'{event_id}\n' for event_id in event_ids)
+
+
+def get_pending_events(events, existing, max_workers=4, item_id=str, path=None):
+    """
+    Works out which events still have to be fetched in an incremental run.
+
+    Events processed once finished in previous runs are skipped, see read_finished_events. Events
+    saved while they were still being played are fetched again, along with the new ones. Events
+    that are not finished yet are skipped, since their data can still change, so a later run
+    picks them up.
+
+    Args:
+        events (list): List of events.
+        existing (pd.DataFrame): Previous output of the driver, with an 'event_id' column.
+        max_workers (int): Maximum number of event headers fetched at the same time. Default is 4.
+        item_id (callable): Function returning the event ID of an item. Default is str.
+        path (str, optional): Path of the output of the driver, next to which the finished events are kept.
+
+    Returns:
+        list: The events that have to be fetched, in their original order.
+    """
+    done = read_finished_events(path) if path else None
+    if done is None:
+        # Outputs saved before the finished events were kept rely on the status in the events table
+        done = set()
+        if 'event_id' in existing.columns:
+            event_ids = existing['event_id'].astype(str)
+            events_total = read_existing_output('data/sofascore_events_total.csv')
+            if {'event_id', 'status'}.issubset(events_total.columns):
+                status = events_total.set_index(events_total['event_id'].astype(str))['status']
+                done = {event_id for event_id in set(event_ids) if status.get(event_id) == 'finished'}
+            else:
+                done = set(event_ids)
+
+    missing = [event for event in events if str(item_id(event)) not in done]
+
+    pending = []
+    for event, status, error in fetch_concurrently(lambda event: get_event_status(item_id(event)), missing, max_workers):
+        if error is None and status == 'finished':
+            pending.append(event)
+
+    print(f"{len(pending)} new or updated finished events out of {len(events)}.")
+    return pending
+
+
+def merge_with_existing(df, existing, key='event_id'):
+    """
+    Merges the rows fetched in an incremental run into the previous output of a driver, replacing
+    the previous rows of the items fetched again.
+
+    Args:
+        df (pd.DataFrame): Rows fetched in this run.
+        existing (pd.DataFrame): Previous output, or None outside incremental mode.
+        key (str): Column that identifies the item each row belongs to. Default is 'event_id'.
+
+    Returns:
+        pd.DataFrame: The merged DataFrame.
+    """
+    if existing is None or existing.empty:
+        return df
+    if key in existing.columns and key in df.columns:
+        existing = existing[~existing[key].astype(str).isin(set(df[key].astype(str)))]
+    return pd.concat([existing, df], ignore_index=True)
+
+
+STORAGE_FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+}
+
+_storage = {'format': 'csv', 'compression': None}
+
+
+def set_storage(format='csv', compression=None):
+    """
+    Selects the format of every table exported by the module.
+
+    Parquet and Feather need pyarrow installed. They keep the column types and are read back
+    much faster than CSV.
+
+    Args:
+        format (str): One of 'csv', 'parquet' or 'feather'. Default is 'csv'.
+        compression (str, optional): Compression codec, e.g. 'zstd', 'snappy' or 'lz4'.
+            Defaults to 'zstd' for Parquet and Feather, and no compression for CSV.
+    """
+    if format not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown storage format '{format}', expected one of {list(STORAGE_FORMATS)}.")
+
+    if compression is None and format != 'csv':
+        compression = 'zstd'
+
+    _storage['format'] = format
+    _storage['compression'] = compression
+
+
+def get_table_path(path):
+    """
+    Returns the path a table is actually stored in, according to the storage format.
+
+    Args:
+        path (str): Path of the table, with a '.csv' extension, e.g. 'data/sofascore_lineup.csv'.
+
+    Returns:
+        str: The path with the extension of the storage format.
+    """
+    return os.path.splitext(path)[0] + STORAGE_FORMATS[_storage['format']]
+
+
+def _to_columnar(df):
+    """
+    Prepares a DataFrame for Parquet or Feather, which need a single type per column.
+    """
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        # Nested values (dicts and lists) are stored as JSON strings
+        if df[column].map(lambda x: isinstance(x, (dict, list))).any():
+            df[column] = df[column].map(lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x)
+
+    df = df.convert_dtypes()
+    df.columns = [str(column) for column in df.columns]
+    return df
+
+
+def write_table(df, path):
+    """
+    Writes a table in the storage format through a temporary file, so a crash never leaves a
+    half-written output.
+
+    Args:
+        df (pd.DataFrame): DataFrame to write.
+        path (str): Path of the table, with a '.csv' extension. It is replaced by the one of the storage format.
+
+    Returns:
+        str: The path the table was written to.
+    """
+    path = get_table_path(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f'{path}.tmp'
+    format = _storage['format']
+    if format == 'parquet':
+        _to_columnar(df).to_parquet(tmp_path, index=False, compression=_storage['compression'])
+    elif format == 'feather':
+        _to_columnar(df).reset_index(drop=True).to_feather(tmp_path, compression=_storage['compression'])
+    else:
+        df.to_csv(tmp_path, index=False, encoding='utf-8', compression=_storage['compression'])
+    os.replace(tmp_path, path)
+
+    # Keep the warehouse in sync with the exported tables
+    warehouse = get_warehouse()
+    if warehouse is not None:
+        warehouse.upsert_output(df, path)
+
+    return path
+
+
+def read_table(path):
+    """
+    Reads a table written by write_table.
+
+    Args:
+        path (str): Path of the table, with a '.csv' extension. It is replaced by the one of the storage format.
+
+    Returns:
+        pd.DataFrame: The stored table.
+    """
+    path = get_table_path(path)
+    format = _storage['format']
+    if format == 'parquet':
+        return pd.read_parquet(path)
+    if format == 'feather':
+        return pd.read_feather(path)
+    return pd.read_csv(path, encoding='utf-8', compression=_storage['compression'])
+
+
+def write_stream(frames, path):
+    """
+    Writes a stream of DataFrames, such as the batches yielded by iter_momentum, as they arrive.
+
+    With uncompressed CSV every batch is appended straight to a temporary file, so memory stays
+    flat however many events are streamed. Parquet, Feather and compressed CSV need the whole
+    table and are written through write_table once the stream ends. Either way, the previous
+    output is only replaced when the stream is complete.
+
+    Args:
+        frames (iterable of pd.DataFrame): Batches to write.
+        path (str): Path of the table, with a '.csv' extension. It is replaced by the one of the storage format.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if _storage['format'] != 'csv' or _storage['compression'] is not None:
+        frames = list(frames)
+        if not frames:
+            return 0
+        df = pd.concat(frames, ignore_index=True)
+        write_table(df, path)
+        return len(df)
+
+    path = get_table_path(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    body_path = f'{path}.body.tmp'
+    tmp_path = f'{path}.tmp'
+    warehouse = get_warehouse()
+    columns = []
+    padded = False
+    rows = 0
+
+    try:
+        # Append the rows of every batch as they arrive, the header is written at the end
+        with open(body_path, 'w', encoding='utf-8', newline='') as body:
+            for df in frames:
+                if df.empty:
+                    continue
+
+                # Columns first seen in a later batch are added at the end of the header
+                new_columns = [column for column in df.columns if column not in columns]
+                padded = padded or (rows > 0 and bool(new_columns))
+                columns += new_columns
+
+                df.reindex(columns=columns).to_csv(body, index=False, header=False)
+                rows += len(df)
+
+                if warehouse is not None:
+                    warehouse.upsert_output(df, path)
+
+        if not rows:
+            return 0
+
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as out, \
+                open(body_path, encoding='utf-8', newline='') as body:
+            pd.DataFrame(columns=columns).to_csv(out, index=False)
+            if padded:
+                # Rows written before the last columns appeared are shorter than the header
+                writer = csv.writer(out, lineterminator='\n')
+                for row in csv.reader(body):
+                    writer.writerow(row + [''] * (len(columns) - len(row)))
+            else:
+                shutil.copyfileobj(body, out)
+        os.replace(tmp_path, path)
+    finally:
+        for leftover in (body_path, tmp_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return rows
+
+
+WAREHOUSE_TABLES = {
+    # Output name: (table, partition columns replaced on upsert, primary key, indexed columns)
+    'sofascore_lineup': ('lineup', ['event_id'], ['event_id', 'id'], [['id'], ['team']]),
+    'sofascore_results': ('results', ['event_id'], ['event_id', 'team_id'], [['team_id']]),
+    'sofascore_shotmap': ('shotmap', ['event_id'], ['event_id', 'id'], [['player'], ['team']]),
+    'sofascore_incidents': ('incidents', ['event_id'], None, [['event_id'], ['player_id'], ['playerIn_id'], ['playerOut_id']]),
+    'sofascore_momentum': ('momentum', ['event_id'], ['event_id', 'minute'], []),
+    'sofascore_events_statistics': ('events_statistics', ['event_id'], ['event_id', 'Categoría', 'name'], []),
+    'sofascore_players_statistics': ('players_statistics', ['player_id', 'league_id', 'season_id'], ['player_id', 'league_id', 'season_id'], [['league_id', 'season_id']]),
+    'sofascore_heatmap': ('heatmap', ['player_id', 'league_id', 'season_id'], None, [['player_id', 'league_id', 'season_id']]),
+    'sofascore_attributes': ('attributes', ['player_id'], ['player_id'], []),
+    'sofascore_player_profile': ('profile', ['player_id'], ['player_id'], []),
+}
+
+
+class Warehouse:
+    """
+    Embedded SQLite database with one indexed table per entity (see WAREHOUSE_TABLES).
+
+    Rows are upserted: every event (or player) in a new batch replaces the rows previously stored
+    for it, so re-running a driver never duplicates data.
+
+    Args:
+        path (str): Path of the SQLite database. Default is 'data/sofascore.db'.
+    """
+
+    def __init__(self, path='data/sofascore.db'):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+
+    @staticmethod
+    def _quote(name):
+        return '"' + str(name).replace('"', '""') + '"'
+
+    @staticmethod
+    def _sql_type(dtype):
+        if dtype.kind in 'iub':
+            return 'INTEGER'
+        if dtype.kind == 'f':
+            return 'REAL'
+        return 'TEXT'
+
+    def _create_table(self, table, df, primary_key, indexes):
+        columns = [f'{self._quote(column)} {self._sql_type(df[column].dtype)}' for column in df.columns]
+        if primary_key:
+            columns.append(f'PRIMARY KEY ({", ".join(self._quote(column) for column in primary_key)})')
+        self._db.execute(f'CREATE TABLE IF NOT EXISTS {self._quote(table)} ({", ".join(columns)})')
+
+        # Add the columns missing from a table created by an older version of the data
+        existing = {row[1] for row in self._db.execute(f'PRAGMA table_info({self._quote(table)})')}
+        for column in df.columns:
+            if column not in existing:
+                self._db.execute(f'ALTER TABLE {self._quote(table)} ADD COLUMN {self._quote(column)} {self._sql_type(df[column].dtype)}')
+
+        for index in indexes:
+            name = self._quote(f'{table}_{"_".join(index)}')
+            self._db.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {self._quote(table)} ({", ".join(self._quote(column) for column in index)})')
+
+    def upsert(self, table, df, partition, primary_key=None, indexes=()):
+        """
+        Inserts a DataFrame into a table, replacing the rows of the partitions it contains.
+
+        Args:
+            table (str): Name of the table. It is created on first use.
+            df (pd.DataFrame): Rows to insert.
+            partition (list): Columns identifying the rows replaced as a whole, e.g. ['event_id'].
+            primary_key (list, optional): Columns of the primary key.
+            indexes (list): Lists of columns to index.
+        """
+        if df.empty:
+            return
+
+        # Nested values (dicts and lists) are stored as JSON strings
+        df = df.copy()
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].map(lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x)
+
+        columns = ', '.join(self._quote(column) for column in df.columns)
+        placeholders = ', '.join('?' for _ in df.columns)
+        partition_columns = ', '.join(self._quote(column) for column in partition)
+        keys = df[partition].drop_duplicates()
+        keys = keys.astype(object).where(keys.notna(), None)
+        rows = df.astype(object).where(df.notna(), None)
+
+        with self._lock:
+            self._create_table(table, df, primary_key, indexes)
+            self._db.execute('DROP TABLE IF EXISTS temp.upsert_keys')
+            self._db.execute(f'CREATE TEMP TABLE upsert_keys ({partition_columns})')
+            self._db.executemany(f'INSERT INTO temp.upsert_keys VALUES ({", ".join("?" for _ in partition)})',
+                                 keys.itertuples(index=False, name=None))
+            self._db.execute(f'DELETE FROM {self._quote(table)} WHERE ({partition_columns}) IN (SELECT {partition_columns} FROM temp.upsert_keys)')
+            self._db.executemany(f'INSERT OR REPLACE INTO {self._quote(table)} ({columns}) VALUES ({placeholders})',
+                                 rows.itertuples(index=False, name=None))
+            self._db.execute('DROP TABLE temp.upsert_keys')
+            self._db.commit()
+
+    def upsert_output(self, df, path):
+        """
+        Upserts the output of a driver into the table of its entity, if it has one.
+
+        Args:
+            df (pd.DataFrame): Output of the driver.
+            path (str): Path the output was written to, e.g. 'data/sofascore_lineup.csv'.
+        """
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name not in WAREHOUSE_TABLES:
+            return
+
+        table, partition, primary_key, indexes = WAREHOUSE_TABLES[name]
+        missing = [column for column in partition + (primary_key or []) if column not in df.columns]
+        if missing:
+            print(f"Skipping warehouse table {table}: missing columns {missing}.")
+            return
+
+        self.upsert(table, df, partition, primary_key, indexes)
+
+    def query(self, sql, params=()):
+        """
+        Runs a SQL query against the warehouse.
+
+        Args:
+            sql (str): The query, e.g. 'SELECT * FROM shotmap JOIN lineup ON ...'.
+            params (tuple): Parameters of the query.
+
+        Returns:
+            pd.DataFrame: The result of the query.
+        """
+        with self._lock:
+            return pd.read_sql_query(sql, self._db, params=params)
+
+    def close(self):
+        """
+        Closes the underlying database.
+        """
+        with self._lock:
+            self._db.close()
+
+
+_warehouse = None
+
+
+def get_warehouse():
+    """
+    Returns the warehouse the exported tables are upserted into.
+
+    Returns:
+        Warehouse: The shared warehouse, or None if it is disabled.
+    """
+    return _warehouse
+
+
+def set_warehouse(warehouse):
+    """
+    Sets the warehouse the exported tables are upserted into, e.g. set_warehouse(Warehouse('data/sofascore.db')).
+
+    Args:
+        warehouse (Warehouse): The warehouse to use, or None to disable it.
+
+    Returns:
+        Warehouse: The previous warehouse, or None if it was disabled.
+    """
+    global _warehouse
+    previous, _warehouse = _warehouse, warehouse
+    return previous
+
+
+class Checkpoint:
+    """
+    Periodically saves the partial results of a batch driver next to its output, so an interrupted
+    run can be resumed without fetching the completed items again.
+
+    The checkpoint is tied to the scope of the run that wrote it, e.g. its items and season, so a
+    run over other items or another season never picks up its rows.
+
+    Args:
+        path (str): Path of the final output. The checkpoint is stored in path + '.partial'.
+        key (str): Column that identifies the item each row belongs to, e.g. 'event_id'.
+        every (int): Number of new items between two saves. Default is 25.
+        scope (str, optional): Identifier of the run, see get_checkpoint_scope.
+    """
+
+    def __init__(self, path, key='event_id', every=25, scope=None):
+        self.path = f'{path}.partial'
+        self.scope_path = f'{path}.partial.scope'
+        self.key = key
+        self.every = every
+        self.scope = scope
+        self.frames = []  # One DataFrame per save, including the one loaded from a previous run
+        self._unsaved = []
+        self._columns = None  # Header of the checkpoint file, once it exists
+
+    def load(self, items=None):
+        """
+        Loads the rows saved by an interrupted run of the same scope. A checkpoint left by a run of
+        another scope is discarded.
+
+        Args:
+            items (set, optional): IDs of the items of this run, as strings. Rows of other items are dropped.
+
+        Returns:
+            set: IDs of the items already completed, as strings.
+        """
+        if not os.path.exists(self.path):
+            return set()
+
+        if self._read_scope() != self.scope:
+            print(f"Discarding {self.path}, it was saved by a run with other items or arguments.")
+            self.remove()
+            return set()
+
+        try:
+            previous = pd.read_csv(self.path, encoding='utf-8')
+        except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            print(f"Discarding {self.path}, it could not be read: {e}")
+            self.remove()
+            return set()
+
+        self._columns = list(previous.columns)
+        if self.key not in previous.columns:
+            return set()
+        if items is not None:
+            previous = previous[previous[self.key].astype(str).isin(items)]
+
+        self.frames.append(previous)
+        return set(previous[self.key].astype(str))
+
+    def _read_scope(self):
+        if not os.path.exists(self.scope_path):
+            return None
+        with open(self.scope_path, encoding='utf-8') as f:
+            return f.read().strip() or None
+
+    def add(self, result):
+        """
+        Adds the rows of a completed item, saving the checkpoint every few items.
+
+        Args:
+            result (pd.DataFrame or list of dict): Rows of the completed item.
+        """
+        self._unsaved.append(result)
+        if len(self._unsaved) >= self.every:
+            self.save()
+
+    def save(self):
+        """
+        Appends the rows added since the last save to the checkpoint file. Rows are written under the
+        header of the file, which is rewritten with every column when new columns show up, e.g. the
+        statistics only goalkeepers have.
+        """
+        if not self._unsaved:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Build a single DataFrame for all the items added since the last save
+        unsaved = _build_frame(self._unsaved)
+        self.frames.append(unsaved)
+        self._unsaved = []
+
+        if not os.path.exists(self.path):
+            with open(self.scope_path, 'w', encoding='utf-8') as f:
+                f.write(self.scope or '')
+            self._columns = None
+        elif self._columns is None:
+            self._columns = list(pd.read_csv(self.path, encoding='utf-8', nrows=0).columns)
+
+        if self._columns is None:
+            unsaved.to_csv(self.path, index=False, encoding='utf-8')
+            self._columns = list(unsaved.columns)
+        elif set(unsaved.columns) <= set(self._columns):
+            # Same columns as the file, possibly in another order
+            unsaved.reindex(columns=self._columns).to_csv(self.path, mode='a', header=False, index=False, encoding='utf-8')
+        else:
+            # New columns: rewrite the whole checkpoint under the union of the columns
+            previous = pd.read_csv(self.path, encoding='utf-8')
+            combined = pd.concat([previous, unsaved], ignore_index=True)
+            combined.to_csv(f'{self.path}.tmp', index=False, encoding='utf-8')
+            os.replace(f'{self.path}.tmp', self.path)
+            self._columns = list(combined.columns)
+
+    def remove(self):
+        """
+        Deletes the checkpoint files once the final output has been written.
+        """
+        for path in (self.path, self.scope_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def get_checkpoint_scope(item_ids, scope=None):
+    """
+    Builds the identifier of a batch run, so its checkpoint is only resumed by a run over the same items.
+
+    Args:
+        item_ids (iterable): IDs of the items of the run, as strings.
+        scope (optional): Other arguments the rows depend on, e.g. (league_id, season_id).
+
+    Returns:
+        str: A hash of the scope and the items.
+    """
+    text = json.dumps([scope, sorted(set(item_ids))], default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def run_batch(fetch, items, path, label, key='event_id', item_id=str, item_name='event', delay=0,
+              max_workers=4, incremental=False, resume=True, checkpoint_every=25, merge=False, scope=None):
+    """
+    Runs a batch driver: fetches every item concurrently, checkpoints the partial results and
+    writes the final output atomically. The items that fail are kept as dead letters, see
+    get_failed_items and retry_failed_items.
+
+    Args:
+        fetch (callable): Function returning the rows of one item as a DataFrame or a list of records,
+            or None if there is nothing to store.
+        items (list): Items to process, e.g. event IDs or player dictionaries.
+        path (str): Path of the output, with a '.csv' extension. It is replaced by the one of the storage format.
+        label (str): Name of the data used in messages, e.g. 'momentum'.
+        key (str): Column of the output that identifies each item. Default is 'event_id'.
+        item_id (callable): Function returning the ID of an item, matched against the key column. Default is str.
+        item_name (str): Name of the items used in messages. Default is 'event'.
+        delay (int): Extra time to wait (in seconds) before each item. Default is 0 seconds.
+        max_workers (int): Maximum number of items fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the items saved in the checkpoint of an interrupted run are not fetched again. Default is True.
+        checkpoint_every (int): Number of completed items between two checkpoint saves. Default is 25.
+        merge (bool): If True, the rows are appended to the previous output instead of replacing it. Default is False.
+        scope (optional): Other arguments the rows depend on, e.g. (league_id, season_id), so the checkpoint
+            of a run with other arguments is not resumed.
+
+    Returns:
+        pd.DataFrame: Combined data for all items, or an empty DataFrame if none collected.
+    """
+    # The checkpoint belongs to the items as requested, before skipping the ones already done
+    item_ids = {str(item_id(item)) for item in items}
+    checkpoint = Checkpoint(path, key, checkpoint_every, get_checkpoint_scope(item_ids, scope))
+
+    # In incremental mode, only fetch the finished events that are new or were saved before they finished
+    existing = None
+    if incremental or merge:
+        existing = read_existing_output(path)
+    if incremental:
+        items = get_pending_events(items, existing, max_workers, item_id, path)
+
+    # Fetch each item once, even if it is listed several times, e.g. a player pulled from two leagues
+    unique_items = {}
+    for item in items:
+        unique_items.setdefault(str(item_id(item)), item)
+    items = list(unique_items.values())
+
+    # Skip the items completed by an interrupted run
+    if resume:
+        completed = checkpoint.load(item_ids)
+        if completed:
+            items = [item for item in items if str(item_id(item)) not in completed]
+            print(f"Resuming {label}: {len(completed)} {item_name}s found in the checkpoint.")
+    else:
+        checkpoint.remove()
+
+    # Events known to be finished when they are submitted, checked without extra requests
+    finished = set()
+
+    def submit(items):
+        for item in items:
+            if key == 'event_id' and (incremental or get_known_event_status(item_id(item)) == 'finished'):
+                finished.add(str(item_id(item)))
+            yield item
+
+    failed = []
+    processed = []  # Finished events whose data is final, including the ones without data
+    try:
+        for item, result, error in fetch_concurrently(fetch, submit(items), max_workers, delay):
+            if error is not None:
+                print(f"Error retrieving {label} for {item_name} {item_id(item)}: {error}")
+                get_metrics().inc('failed_items', label=label)
+                if is_retryable(error):
+                    failed.append(item)
+                    continue
+            else:
+                get_metrics().inc('items', label=label)
+                if result is not None and len(result):
+                    checkpoint.add(result)
+            if str(item_id(item)) in finished:
+                processed.append(str(item_id(item)))
+    finally:
+        # Keep whatever was fetched if the run is interrupted
+        checkpoint.save()
+        retry_args = dict(fetch=fetch, path=path, label=label, key=key, item_id=item_id, item_name=item_name,
+                          checkpoint_every=checkpoint_every)
+        set_failed_items(label, failed, item_name, retry_args)
+
+    if not checkpoint.frames:
+        checkpoint.remove()
+        if key == 'event_id':
+            write_finished_events(path, processed)
+        print(f"No {label} data was collected.")
+        return pd.DataFrame() if existing is None else existing
+
+    # Concatenate all DataFrames and save them, then drop the checkpoint
+    result_df = merge_with_existing(pd.concat(checkpoint.frames, ignore_index=True), existing, key)
+    write_table(result_df, path)
+    checkpoint.remove()
+
+    # A full run replaces the output, so only its events stay recorded as finished
+    if key == 'event_id':
+        write_finished_events(path, processed, append=existing is not None)
+
+    return result_df
+
+
+def iter_batch(fetch, items, label, item_id=str, item_name='event', delay=0, max_workers=4, batch_size=1):
+    """
+    Fetches every item concurrently and yields the DataFrames as they arrive, so callers never
+    hold more than one batch in memory.
+
+    Args:
+        fetch (callable): Function returning the rows of one item as a DataFrame or a list of records,
+            or None if there is nothing to store.
+        items (list): Items to process, e.g. event IDs or player dictionaries.
+        label (str): Name of the data used in messages, e.g. 'momentum'.
+        item_id (callable): Function returning the ID of an item, used in messages. Default is str.
+        item_name (str): Name of the items used in messages. Default is 'event'.
+        delay (int): Extra time to wait (in seconds) before each item. Default is 0 seconds.
+        max_workers (int): Maximum number of items fetched at the same time. Default is 4.
+        batch_size (int): Number of items combined in each yielded DataFrame. Default is 1.
+
+    Yields:
+        pd.DataFrame: Data of up to batch_size items, in the order of the items.
+
+    The items that fail are kept as dead letters, see get_failed_items.
+    """
+    batch = []
+    failed = []
+    try:
+        for item, result, error in fetch_concurrently(fetch, items, max_workers, delay):
+            if error is not None:
+                print(f"Error retrieving {label} for {item_name} {item_id(item)}: {error}")
+                get_metrics().inc('failed_items', label=label)
+                if is_retryable(error):
+                    failed.append(item)
+            else:
+                get_metrics().inc('items', label=label)
+                if result is not None and len(result):
+                    batch.append(result)
+
+            if len(batch) >= batch_size:
+                yield _build_frame(batch)
+                batch = []
+
+        if batch:
+            yield _build_frame(batch)
+    finally:
+        set_failed_items(label, failed, item_name)
+
+
+def _build_frame(results):
+    """
+    Builds a single DataFrame from the rows of several items, creating one DataFrame for each run
+    of consecutive record lists instead of one per item.
+    """
+    start = time.perf_counter()
+    frames = []
+    records = []
+    for result in results:
+        if isinstance(result, pd.DataFrame):
+            if records:
+                frames.append(pd.DataFrame(records))
+                records = []
+            frames.append(result)
+        else:
+            records.extend(result)
+
+    if records:
+        frames.append(pd.DataFrame(records))
+
+    if not frames:
+        frame = pd.DataFrame()
+    else:
+        frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    get_metrics().inc('parse_seconds', time.perf_counter() - start, stage='frames')
+    return frame
 
-    Returns:
-        dict: The JSON response containing average position information.
-    """
-    api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/average-positions'
-    data = request_to_json(api_url)
-    return data
 
+_dead_letters = {}  # Label -> (failed items, run_batch arguments to retry them or None)
+_dead_letters_lock = threading.Lock()
 
-def get_event_data(event_id):
+
+def is_retryable(error):
     """
-    Retrieves general data for a given event from Sofascore.
+    Tells whether an item that failed with this error may succeed if fetched again. Only failed
+    requests that were not answered with a definitive status, e.g. a 404, and network errors are
+    worth retrying. Any other error, e.g. a response without the expected fields, would fail again.
 
-    Parameters:
-        event_id (int): The unique identifier for the event.
+    Args:
+        error (Exception): Error raised while fetching the item.
 
     Returns:
-        dict: The JSON response containing event data.
+        bool: Whether the item should be kept as a dead letter.
     """
-    api_url = f'https://www.sofascore.com/api/v1/event/{event_id}'
-    data = request_to_json(api_url)
-    return data
+    if isinstance(error, SofascoreRequestError):
+        return error.retryable
+    return isinstance(error, (OSError, http.client.HTTPException))
 
 
-def get_tournament_standing(tournament_id, season_id):
+def set_failed_items(label, items, item_name='event', retry_args=None):
     """
-    Fetches the standings of a specific tournament and season from Sofascore.
+    Replaces the dead letters of a driver with the items that failed in its last run.
 
     Args:
-        tournament_id (str): The unique identifier for the tournament.
-        season_id (str): The unique identifier for the season.
-
-    Returns:
-        dict: A dictionary containing league, country, season, team names, and team IDs.
+        label (str): Name of the data of the driver, e.g. 'momentum'.
+        items (list): Items that failed.
+        item_name (str): Name of the items used in messages. Default is 'event'.
+        retry_args (dict, optional): Arguments of run_batch needed to retry the items.
     """
-    api_url = f'https://www.sofascore.com/api/v1/unique-tournament/{tournament_id}/season/{season_id}/standings/total'
+    with _dead_letters_lock:
+        _dead_letters[label] = (list(items), retry_args)
 
-    try:
-        data = request_to_json(api_url)
+    if items:
+        print(f"{len(items)} {item_name}s failed retrieving {label}, see get_failed_items('{label}').")
 
-        league = data['standings'][0]['tournament']['name']
-        country = data['standings'][0]['tournament']['category']['name']
-        season = datetime.fromtimestamp(data['standings'][0]['updatedAtTimestamp']).year
 
-        teams_name = [row['team']['name'] for row in data['standings'][0]['rows']]
-        teams_id = [row['team']['id'] for row in data['standings'][0]['rows']]
+def get_failed_items(label):
+    """
+    Returns the items that failed in the last run of a driver, which can be passed to the driver
+    again, e.g. iter_momentum(get_failed_items('momentum')).
 
-        return {
-            'league': league,
-            'country': country,
-            'season': season,
-            'teams_name': teams_name,
-            'teams_id': teams_id
-        }
+    Args:
+        label (str): Name of the data of the driver, e.g. 'momentum' or 'player statistics'.
 
-    except requests.exceptions.RequestException as e:
-        print(f'Error fetching tournament standings: {e}')
-        return None
-    
+    Returns:
+        list: The failed items, e.g. event IDs or player dictionaries.
+    """
+    with _dead_letters_lock:
+        items, _ = _dead_letters.get(label, ([], None))
+    return list(items)
 
-def get_player_tournaments(player_id):
+
+def retry_failed_items(label, delay=0, max_workers=4):
     """
-    Fetches the tournaments and seasons a player has participated in from the Sofascore API.
+    Fetches again the items that failed in the last run of a batch driver, appending their rows to its output.
 
     Args:
-        player_id (int): The unique identifier for the player in Sofascore.
+        label (str): Name of the data of the driver, e.g. 'momentum' or 'player statistics'.
+        delay (int): Extra time to wait (in seconds) before each item. Default is 0 seconds.
+        max_workers (int): Maximum number of items fetched at the same time. Default is 4.
 
     Returns:
-        DataFrame: A pandas DataFrame containing tournament and season information for the player.
+        pd.DataFrame: The output of the driver including the recovered rows.
     """
-    
-    tournaments = []
-    api_url = f'https://www.sofascore.com/api/v1/player/{player_id}/statistics/seasons'
-    
-    data = request_to_json(api_url)
+    with _dead_letters_lock:
+        items, retry_args = _dead_letters.get(label, ([], None))
 
-    current_year = str(datetime.now().year)
-    
-    # Loop through each tournament and its seasons in the JSON data
-    for tournament in data['uniqueTournamentSeasons']:
-        for season in tournament['seasons']:
-            season_year = int(season['year'][-2:])
-            if season_year > int(current_year[-2:]) - 2:  # Only include seasons from the last two years
-                competition_name = season['name']
-                tournaments_id = tournament['uniqueTournament']['id']
-                season_id = season['id']
-                tournaments.append([competition_name, tournaments_id, season_id])
+    if retry_args is None:
+        raise ValueError(f"No batch run of '{label}' to retry, pass get_failed_items('{label}') to the driver instead.")
 
-    # Convert the list of tournaments to a pandas DataFrame
-    tournaments_df = pd.DataFrame(tournaments, columns=['competition_name', 'tournaments_id', 'season_id'])
-    tournaments_df['player_id'] = player_id
-    
-    return tournaments_df
+    return run_batch(items=items, delay=delay, max_workers=max_workers, resume=False, merge=True, **retry_args)
 
 
-def get_heatmap(player_id, league_id, season_id):
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the call and the others
+    wait for it and share its result, so identical requests in flight hit the network once.
     """
-    Fetches heatmap data for a player from a specific league and season from the Sofascore API.
 
-    Args:
-        player_id (int): Player's unique identifier in Sofascore.
-        league_id (int): League's unique identifier in Sofascore.
-        season_id (int): Season's unique identifier in Sofascore.
+    def __init__(self):
+        self._calls = {}  # Key -> Future of the call in flight
+        self._lock = threading.Lock()
 
-    Returns:
-        DataFrame: Contains heatmap data with coordinates (x, y) and count of actions.
-    """
-    
-    heatmap = []
-    api_url = f'https://www.sofascore.com/api/v1/player/{player_id}/unique-tournament/{league_id}/season/{season_id}/heatmap/overall'
-    
-    try:
-        data = request_to_json(api_url)
+    def do(self, key, func):
+        """
+        Runs func, unless a call for the same key is already in flight, in which case its result is returned.
 
-        if 'points' in data:
-            for point in data['points']:
-                x = point.get('x', 0)
-                y = point.get('y', 0)
-                count = point.get('count', 0)
-                heatmap.append([x, y, count])
+        Args:
+            key (str): Identifier of the call, e.g. the URL.
+            func (callable): Function without arguments performing the call.
+
+        Returns:
+            The result of func, shared by every concurrent caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            return call.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
         else:
-            print(f"No heatmap data found for player {player_id} in league {league_id} and season {season_id}.")
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
 
-    except:
-        # Return an empty DataFrame with appropriate columns if an exception occurs
-        return pd.DataFrame(columns=['x', 'y', 'count', 'player_id', 'league_id', 'season_id'])
 
-    heatmap_df = pd.DataFrame(heatmap, columns=['x', 'y', 'count'])
-    heatmap_df['player_id'] = player_id
-    heatmap_df['league_id'] = league_id
-    heatmap_df['season_id'] = season_id
-    
-    return heatmap_df
+_in_flight = SingleFlight()
 
 
 def request_to_json(api_url):
     """Fetch and decode JSON data from the SofaScore API.
 
+    Concurrent callers of the same URL share one request and one parsed response. Failed requests
+    are retried as set by the retry policy, see get_retry_policy.
+
     Args:
         api_url (str): The specific endpoint path for the request.
 
     Returns:
-        dict: The parsed JSON data from the API if successful, None otherwise.
-    """    
-    time.sleep(5)
+        dict: The parsed JSON data from the API.
 
-    try:
-        connection = http.client.HTTPSConnection("api.sofascore.com")
-        connection.request("GET", api_url)
-        response = connection.getresponse()
-        data = response.read()
-        connection.close()
-
-        # Decode and parse JSON
-        data = data.decode('utf-8')
-        return json.loads(data)
-
-    except json.JSONDecodeError:
-        print("Error: Unable to decode JSON response.")
+    Raises:
+        SofascoreRequestError: If the request fails, e.g. with a 404 or after exhausting the retries of a 503.
+    """
+    return _in_flight.do(api_url, lambda: _fetch_json(api_url))
+
+
+def _fetch_json(api_url):
+    """
+    Performs the request of request_to_json, serving it from the cache when possible.
+    """
+    # Serve the response from the cache when it is still valid
+    cache = get_cache()
+    data = _lookup_cache(cache, api_url)
+    if data is not None:
+        return data
+
+    policy = get_retry_policy()
+    attempt = 0
+    while True:
+        attempt += 1
+        _check_circuit(policy, api_url)
+        get_metrics().inc('rate_limit_wait_seconds', get_rate_limiter().acquire())
+
+        status, headers, body = None, None, b''
+        start = time.perf_counter()
+        try:
+            status, headers, body = get_transport().get(api_url)
+        except (http.client.HTTPException, OSError) as e:
+            error = e
+        finally:
+            _record_response(api_url, start, status, body)
+
+        if status is not None:
+            error = _check_status(policy, api_url, status)
+            if error is None:
+                return _decode_json(api_url, status, body, cache)
+
+        time.sleep(_retry_delay(policy, api_url, attempt, status, headers, error))
+
+
+def _lookup_cache(cache, api_url):
+    """
+    Returns the cached response of a URL, or None, counting the cache hits and misses.
+
+    An expired response of an event not known to be finished is served if the event turns out
+    to be finished, which takes one request for the event header instead of one per endpoint.
+    """
+    if cache is None:
         return None
-    except Exception as e:
-        print(f"Error fetching data: {e}")
+
+    data = cache.get(api_url)
+    if data is None:
+        event_id = cache.stale_event(api_url)
+        if event_id is not None:
+            try:
+                cache.record_event(event_id, get_event_data(event_id))
+                data = cache.get(api_url)
+            except SofascoreRequestError:
+                pass
+
+    _count_cache_lookup(api_url, data)
+    return data
+
+
+def _count_cache_lookup(api_url, data):
+    get_metrics().inc('cache_hits' if data is not None else 'cache_misses', endpoint=get_endpoint(api_url))
+
+
+def _record_response(api_url, start, status, body):
+    """
+    Records the latency, status and size of a response, or a network error if status is None.
+    """
+    metrics = get_metrics()
+    endpoint = get_endpoint(api_url)
+    metrics.observe('request_seconds', time.perf_counter() - start, endpoint=endpoint)
+    metrics.inc('requests', endpoint=endpoint, status='error' if status is None else str(status))
+    metrics.inc('response_bytes', len(body), endpoint=endpoint)
+
+
+def _check_circuit(policy, api_url):
+    """
+    Fails fast while the circuit breaker of the retry policy is open.
+    """
+    if not policy.breaker.allow():
+        raise SofascoreRequestError(f"Circuit open after repeated failures, {api_url} was not requested.", api_url)
+
+
+def _check_status(policy, api_url, status):
+    """
+    Checks the status of a response, returning a description of the failure if it is worth retrying.
+    """
+    if 200 <= status < 300:
+        policy.breaker.record_success()
         return None
 
+    if status not in policy.retry_statuses:
+        # The API answered, e.g. with a 404 for a player without statistics, so it is not down
+        policy.breaker.record_success()
+        raise SofascoreRequestError(f"Request to {api_url} failed with status {status}.", api_url, status, retryable=False)
+
+    return f"status {status}"
+
+
+def _retry_delay(policy, api_url, attempt, status, headers, error):
+    """
+    Records a failed attempt and returns the time to wait before the next one, raising if there is none left.
+    """
+    policy.breaker.record_failure()
+    if attempt >= policy.max_attempts:
+        raise SofascoreRequestError(f"Request to {api_url} failed after {attempt} attempts: {error}.", api_url, status)
+
+    # Never retry sooner than the server asked, fail instead so the item is kept as a dead letter
+    delay = policy.delay(attempt, headers)
+    if delay > policy.max_backoff:
+        raise SofascoreRequestError(f"Request to {api_url} failed: {error}, the server asked to retry after "
+                                    f"{delay:.0f} seconds, more than max_backoff.", api_url, status)
+
+    metrics = get_metrics()
+    metrics.inc('retries', endpoint=get_endpoint(api_url))
+    metrics.inc('retry_wait_seconds', delay)
+    return delay
+
+
+def _decode_json(api_url, status, body, cache):
+    """
+    Decodes the body of a successful response, caching it.
+    """
+    start = time.perf_counter()
+    try:
+        data = json.loads(body.decode('utf-8'))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise SofascoreRequestError(f"Unable to decode the JSON response of {api_url}.", api_url, status)
+    finally:
+        get_metrics().inc('parse_seconds', time.perf_counter() - start, stage='json')
+
+    # Only successful responses are cached
+    if cache is not None and status == 200:
+        cache.set(api_url, data)
+
+    return data
+
+
+class AsyncClient:
+    """
+    Async counterpart of the fetchers, so a whole league and player pull can run in one event
+    loop. Requests share one aiohttp session, are bounded by a semaphore and go through the
+    module's rate limiter, retry policy and response cache. The responses are parsed by the sync
+    functions, and the fetchers raise SofascoreRequestError when the request fails.
+
+    aiohttp is only needed, and imported, when the client is used.
+
+    Example:
+        async with AsyncClient() as client:
+            results = await client.fetch_all(client.get_momentum, event_ids)
+
+    Args:
+        host (str): Host to connect to. Default is 'api.sofascore.com'.
+        port (int, optional): Port to connect to. Defaults to the standard port of the scheme.
+        https (bool): Whether to use HTTPS. Set it to False to target a local fake server.
+        max_connections (int): Maximum number of requests in flight at the same time. Default is 8.
+        timeout (float): Total timeout of each request in seconds. Default is 30 seconds.
+    """
+
+    def __init__(self, host='api.sofascore.com', port=None, https=True, max_connections=8, timeout=30):
+        scheme = 'https' if https else 'http'
+        self.base_url = f'{scheme}://{host}' + (f':{port}' if port else '')
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session = None
+        self._slots = None
+        self._in_flight = {}  # URL -> task of the request in flight
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError("AsyncClient needs aiohttp, install it with 'pip install aiohttp'.")
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._slots = asyncio.Semaphore(self.max_connections)
+        return self._session
+
+    async def close(self):
+        """
+        Closes the session and its connections.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request_to_json(self, api_url):
+        """
+        Async version of request_to_json.
+
+        Args:
+            api_url (str): Full URL or path of the endpoint. Only the path and query are sent.
+
+        Returns:
+            dict: The parsed JSON data from the API.
+
+        Raises:
+            SofascoreRequestError: If the request fails.
+        """
+        # Concurrent callers of the same URL share one request and one parsed response
+        task = self._in_flight.get(api_url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_json(api_url))
+            self._in_flight[api_url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(api_url, None))
+
+        # A cancelled caller must not cancel the request shared with the others
+        return await asyncio.shield(task)
+
+    async def _fetch_json(self, api_url):
+        # Serve the response from the cache when it is still valid
+        cache = get_cache()
+        data = await self._lookup_cache(cache, api_url)
+        if data is not None:
+            return data
+
+        session = self._get_session()
+        import aiohttp
+        parts = urlsplit(api_url)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+
+        policy = get_retry_policy()
+        attempt = 0
+        while True:
+            attempt += 1
+            _check_circuit(policy, api_url)
+
+            status, headers, body = None, None, b''
+            start = time.perf_counter()
+            try:
+                async with self._slots:
+                    get_metrics().inc('rate_limit_wait_seconds', await get_rate_limiter().acquire_async())
+                    start = time.perf_counter()
+                    async with session.get(self.base_url + path) as response:
+                        status = response.status
+                        headers = dict(response.headers)
+                        body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            finally:
+                _record_response(api_url, start, status, body)
+
+            if status is not None:
+                error = _check_status(policy, api_url, status)
+                if error is None:
+                    return _decode_json(api_url, status, body, cache)
+
+            # Wait outside the semaphore so the slot can serve other requests
+            await asyncio.sleep(_retry_delay(policy, api_url, attempt, status, headers, error))
+
+    async def _lookup_cache(self, cache, api_url):
+        # Async version of _lookup_cache, checking the status of the event without blocking the loop
+        if cache is None:
+            return None
+
+        data = cache.get(api_url)
+        if data is None:
+            event_id = cache.stale_event(api_url)
+            if event_id is not None:
+                try:
+                    cache.record_event(event_id, await self.get_event_data(event_id))
+                    data = cache.get(api_url)
+                except SofascoreRequestError:
+                    pass
+
+        _count_cache_lookup(api_url, data)
+        return data
+
+    async def fetch_all(self, func, items):
+        """
+        Runs an async fetcher for every item concurrently, bounded by max_connections.
+
+        Args:
+            func (callable): Coroutine function taking one item, e.g. client.get_momentum.
+            items (list): Items to process.
+
+        Returns:
+            list: (item, result, error) tuples in the order of the items, error being None on success.
+        """
+        async def run(item):
+            try:
+                return item, await func(item), None
+            except Exception as e:
+                return item, None, e
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+    async def get_event_data(self, event_id):
+        """
+        Async version of get_event_data, sharing the module's event repository.
+        """
+        repository = get_event_repository()
+        data = repository.lookup(event_id)
+        if data is None:
+            data = await self.request_to_json(f'https://www.sofascore.com/api/v1/event/{event_id}')
+            repository.put(event_id, data)
+        return data
+
+    async def get_lineups(self, event_id):
+        """
+        Async version of get_lineups.
+        """
+        return await self.request_to_json(f'https://www.sofascore.com/api/v1/event/{event_id}/lineups')
+
+    async def get_average_positions(self, event_id):
+        """
+        Async version of get_average_positions.
+        """
+        return await self.request_to_json(f'https://www.sofascore.com/api/v1/event/{event_id}/average-positions')
+
+    async def get_momentum(self, event_id):
+        """
+        Async version of get_momentum.
+        """
+        data = await self.request_to_json(f'https://www.sofascore.com/api/v1/event/{event_id}/graph')
+        return get_momentum(event_id, data=data)
+
+    async def get_shotmap(self, event_id):
+        """
+        Async version of get_shotmap.
+        """
+        data, event_data = await asyncio.gather(
+            self.request_to_json(f'https://www.sofascore.com/api/v1/event/{event_id}/shotmap'),
+            self.get_event_data(event_id),
+        )
+        return get_shotmap(event_id, data=data, event_data=event_data)
+
+    async def get_incidents(self, event_id):
+        """
+        Async version of get_incidents.
+        """
+        data = await self.request_to_json(f'https://www.sofascore.com/api/v1/event/{event_id}/incidents')
+        return get_incidents(event_id, data=data)
+
+    async def get_event_statistics(self, event_id, records=False):
+        """
+        Async version of get_event_statistics.
+        """
+        data = await self.request_to_json(f'https://www.sofascore.com/api/v1/event/{event_id}/statistics')
+        return get_event_statistics(event_id, records=records, data=data)
+
+    async def get_player_statistics(self, player_id, league_id, season_id):
+        """
+        Async version of get_player_statistics.
+        """
+        data = await self.request_to_json(f'https://www.sofascore.com/api/v1/player/{player_id}/unique-tournament/{league_id}/season/{season_id}/statistics/overall')
+        return get_player_statistics(player_id, league_id, season_id, data=data)
+
+    async def get_heatmap(self, player_id, league_id, season_id):
+        """
+        Async version of get_heatmap.
+        """
+        data = await self.request_to_json(f'https://www.sofascore.com/api/v1/player/{player_id}/unique-tournament/{league_id}/season/{season_id}/heatmap/overall')
+        return get_heatmap(player_id, league_id, season_id, data=data)
+
+
+def normalize_records(records, fields, dtypes=None):
+    """
+    Flattens a list of nested JSON records into a DataFrame of scalar columns, building each
+    column once with a single pass over the records.
+
+    Args:
+        records (list of dict): Records returned by the API, e.g. data['shotmap'].
+        fields (dict): Output column mapped to the key path of its value, e.g. {'x': ('playerCoordinates', 'x')}.
+            Missing keys give None.
+        dtypes (dict, optional): Type of some of the output columns, e.g. {'player_id': 'Int64'}.
+
+    Returns:
+        pd.DataFrame: One row per record and one column per field, in the order of fields.
+    """
+    columns = {}
+    for column, path in fields.items():
+        values = []
+        for record in records:
+            value = record
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            values.append(value)
+        columns[column] = values
+
+    df = pd.DataFrame(columns, columns=list(fields))
+    if dtypes:
+        df = df.astype(dtypes)
+
+    return df
+
 
 def get_player_attributes(player_id):
     """
@@ -1401,15 +3932,19 @@ def get_player_attributes(player_id):
     return attributes_df
 
 
-def get_player_statistics(player_id, league_id, season_id):
+def get_player_statistics(player_id, league_id, season_id, data=None):
     """
     Fetches and organizes player statistics from Sofascore into a DataFrame.
     """
     api_url = f'https://www.sofascore.com/api/v1/player/{player_id}/unique-tournament/{league_id}/season/{season_id}/statistics/overall'
     
     try:
-        data = request_to_json(api_url)
-    except requests.exceptions.RequestException:
+        if data is None:
+            data = request_to_json(api_url)
+    except SofascoreRequestError as e:
+        # Only a definitive answer, e.g. a 404, means there are no statistics; other failures are retried later
+        if e.retryable:
+            raise
         print(f"No statistics data found for player {player_id} in league {league_id} and season {season_id}.")
         return pd.DataFrame()
     
@@ -1488,149 +4023,128 @@ def get_player_statistics(player_id, league_id, season_id):
     return statistics_df
 
 
-def get_highlights(event_id):
+def get_highlights(event_id, records=False):
     """
     Retrieves general data for a given event from Sofascore.
 
     Parameters:
         event_id (int): The unique identifier for the event.
+        records (bool): If True, the highlight is returned as a list of records instead of a DataFrame. Default is False.
 
     Returns:
-        dict: The JSON response containing highlights data.
+        pd.DataFrame: The highlight of the event, or a list with its record if records is True.
     """
     api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/highlights'
     data = request_to_json(api_url)
 
-    event_id = int(event_id)
-    title = data['highlights'][0]['title']
-    video = data['highlights'][0]['url']
-    thumbnail = data['highlights'][0]['thumbnailUrl']
-
-    
     highlight = {
-        'event_id': [event_id],
-        'title': [title],
-        'video': [video],
-        'thumbnail': [thumbnail]
+        'event_id': int(event_id),
+        'title': data['highlights'][0]['title'],
+        'video': data['highlights'][0]['url'],
+        'thumbnail': data['highlights'][0]['thumbnailUrl']
     }
 
-    highlights_df = pd.DataFrame(highlight)
-
-    return highlights_df
-
-
-def get_event_statistics(event_id):
+    return [highlight] if records else pd.DataFrame([highlight])
+
+
+STATISTICS_CATEGORIES = ['General', 'Remates', 'Ataques', 'Pases', 'Duelos', 'Defensa', 'Arquero']
+
+# Columns of the event statistics, in the order of the exported table, followed by 'event_id'
+EVENT_STATISTICS_COLUMNS = ['name', 'home', 'away', 'statisticsType', 'valueType', 'homeValue', 'awayValue', 'key',
+                            'Categoría', 'homeTotal', 'awayTotal']
+
+# Spanish names of the statistics, the ones missing keep their original name
+STATISTICS_TRANSLATIONS = {
+    "Ball possession": "Posesión",
+    "Expected goals": "Goles esperados",
+    "Total shots": "Remates totales",
+    "Goalkeeper saves": "Atajadas",
+    "Corner kicks": "Córners",
+    "Fouls": "Faltas",
+    "Passes": "Pases",
+    "Tackles": "Entradas",
+    "Free kicks": "Tiros libre",
+    "Yellow cards": "Tarjetas amarillas",
+    "Red cards": "Tarjetas rojas",
+    "Shots on target": "Remates al arco",
+    "Hit woodwork": "Palo",
+    "Shots off target": "Remates fuera",
+    "Blocked shots": "Remates bloqueados",
+    "Shots inside box": "Remates dentro del área",
+    "Shots outside box": "Remates fuera del área",
+    "Through balls": "Pases en profundidad",
+    "Touches in penalty area": "Toques en el área penal",
+    "Offsides": "Fuera de juego",
+    "Accurate passes": "Pases precisos",
+    "Throw-ins": "Laterales",
+    "Final third phase": "Fase de tercio final",
+    "Long balls": "Pases largos",
+    "Crosses": "Centros",
+    "Duels": "Duelos",
+    "Dispossessed": "Pérdidas de posesión",
+    "Ground duels": "Duelos en el suelo",
+    "Aerial duels": "Duelos aéreos",
+    "Dribbles": "Regates",
+    "Total tackles": "Entradas totales",
+    "Interceptions": "Intercepciones",
+    "Clearances": "Despejes",
+    "Total saves": "Salvadas totales",
+    "Goal kicks": "Saques de arco",
+    "Errors lead to a shot": "Errores seguidos por remate",
+    "High claims": "Centros descolgados"
+}
+
+
+def get_event_statistics(event_id, records=False, data=None):
     """
     Retrieves general data for a given event from Sofascore.
 
     Parameters:
         event_id (int): The unique identifier for the event.
+        records (bool): If True, the statistics are returned as a list of records instead of a DataFrame. Default is False.
+        data (dict, optional): Response already fetched, e.g. by AsyncClient. Fetched here by default.
 
     Returns:
-        pd.DataFrame: A DataFrame containing statistics data with translated names.
+        pd.DataFrame: A DataFrame containing statistics data with translated names, or a list of records if records is True.
     """
     api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/statistics'
     
     # Make a request to the API and get the data
-    data = request_to_json(api_url)
+    if data is None:
+        data = request_to_json(api_url)
 
     event_id = int(event_id)
-    match_overview = data['statistics'][0]['groups'][0]['statisticsItems']
-    shots = data['statistics'][0]['groups'][1]['statisticsItems']
-    attack = data['statistics'][0]['groups'][2]['statisticsItems']
-    passes = data['statistics'][0]['groups'][3]['statisticsItems']
-    duels = data['statistics'][0]['groups'][4]['statisticsItems']
-    defending = data['statistics'][0]['groups'][5]['statisticsItems']
-    goalkeeping = data['statistics'][0]['groups'][6]['statisticsItems']
-
-    # Create DataFrames for each group of statistics
-    df_match_overview = pd.DataFrame(match_overview)
-    df_match_overview['Categoría'] = 'General'
-
-    df_shots = pd.DataFrame(shots)
-    df_shots['Categoría'] = 'Remates'
-
-    df_attack = pd.DataFrame(attack)
-    df_attack['Categoría'] = 'Ataques'
-
-    df_passes = pd.DataFrame(passes)
-    df_passes['Categoría'] = 'Pases'
-
-    df_duels = pd.DataFrame(duels)
-    df_duels['Categoría'] = 'Duelos'
-
-    df_defending = pd.DataFrame(defending)
-    df_defending['Categoría'] = 'Defensa'
-
-    df_goalkeeping = pd.DataFrame(goalkeeping)
-    df_goalkeeping['Categoría'] = 'Arquero'
-
-    # Concatenate all DataFrames
-    statistics_df = pd.concat([df_match_overview, df_shots, df_attack, df_passes, df_duels, df_defending, df_goalkeeping], ignore_index=True)
-    statistics_df['event_id'] = event_id
+    statistics = []
 
-    # Dictionary of translations
-    translations = {
-        "Ball possession": "Posesión",
-        "Expected goals": "Goles esperados",
-        "Total shots": "Remates totales",
-        "Goalkeeper saves": "Atajadas",
-        "Corner kicks": "Córners",
-        "Fouls": "Faltas",
-        "Passes": "Pases",
-        "Tackles": "Entradas",
-        "Free kicks": "Tiros libre",
-        "Yellow cards": "Tarjetas amarillas",
-        "Red cards": "Tarjetas rojas",
-        "Shots on target": "Remates al arco",
-        "Hit woodwork": "Palo",
-        "Shots off target": "Remates fuera",
-        "Blocked shots": "Remates bloqueados",
-        "Shots inside box": "Remates dentro del área",
-        "Shots outside box": "Remates fuera del área",
-        "Through balls": "Pases en profundidad",
-        "Touches in penalty area": "Toques en el área penal",
-        "Offsides": "Fuera de juego",
-        "Accurate passes": "Pases precisos",
-        "Throw-ins": "Laterales",
-        "Final third phase": "Fase de tercio final",
-        "Long balls": "Pases largos",
-        "Crosses": "Centros",
-        "Duels": "Duelos",
-        "Dispossessed": "Pérdidas de posesión",
-        "Ground duels": "Duelos en el suelo",
-        "Aerial duels": "Duelos aéreos",
-        "Dribbles": "Regates",
-        "Total tackles": "Entradas totales",
-        "Interceptions": "Intercepciones",
-        "Clearances": "Despejes",
-        "Total saves": "Salvadas totales",
-        "Goal kicks": "Saques de arco",
-        "Errors lead to a shot": "Errores seguidos por remate",
-        "High claims": "Centros descolgados"
-    }
-
-    # Apply translations to the 'name' column, keeping originals if there's no translation
-    statistics_df['name'] = statistics_df['name'].map(translations).fillna(statistics_df['name'])
-
-    # Drop unnecessary columns
-    statistics_df = statistics_df.drop(columns=['compareCode', 'renderType'])
+    # The groups of the first period ('ALL') come in the order of STATISTICS_CATEGORIES
+    groups = data['statistics'][0]['groups']
+    for group, category in zip(groups, STATISTICS_CATEGORIES):
+        for item in group['statisticsItems']:
+            # Start from every column in order, so the records of all events share the same layout
+            statistic = dict.fromkeys(EVENT_STATISTICS_COLUMNS)
+            statistic.update((column, value) for column, value in item.items() if column not in ('compareCode', 'renderType'))
+            statistic['name'] = STATISTICS_TRANSLATIONS.get(statistic['name'], statistic['name'])
+            statistic['Categoría'] = category
+            statistic['event_id'] = event_id
+            statistics.append(statistic)
 
-    return statistics_df
+    return statistics if records else pd.DataFrame(statistics)
 
 
-def get_momentum(event_id):
+def get_momentum(event_id, data=None):
     """
     Fetches momentum data for a specified event from Sofascore's API.
 
     Args:
         event_id (int): Unique identifier for the event.
+        data (dict, optional): Response already fetched, e.g. by AsyncClient. Fetched here by default.
 
     Returns:
         pd.DataFrame: DataFrame containing momentum data points for the event.
     """
     api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/graph'
-    data = request_to_json(api_url)
+    if data is None:
+        data = request_to_json(api_url)
 
     momentum_df = pd.DataFrame(data['graphPoints'])
     momentum_df['event_id'] = int(event_id)
@@ -1659,7 +4173,10 @@ def get_team_statistics(team_id, league_id, season_id):
         # Fetch the JSON data from the API
         data = request_to_json(api_url)
 
-    except requests.exceptions.RequestException:
+    except SofascoreRequestError as e:
+        # Only a definitive answer, e.g. a 404, means there are no statistics; other failures are retried later
+        if e.retryable:
+            raise
         print(f'No statistics data found for team {team_id} in league {league_id} and season {season_id}.')
         return pd.DataFrame(columns=[
             'Goles convertidos', 'Goles recibidos', 'Asistencias', 'Remates', 'Goles de penal', 'Penales ejecutados',
@@ -1701,6 +4218,7 @@ def get_team_statistics(team_id, league_id, season_id):
     return statistics_df
 
 
+@instrument_driver
 def get_statistics_from_single_team(team_id, league_id, season_id):
     """
     Fetches and organizes team statistics from Sofascore into a DataFrame.
@@ -1722,7 +4240,10 @@ def get_statistics_from_single_team(team_id, league_id, season_id):
         # Fetch the JSON data from the API
         data = request_to_json(api_url)
 
-    except requests.exceptions.RequestException:
+    except SofascoreRequestError as e:
+        # Only a definitive answer, e.g. a 404, means there are no statistics; other failures are retried later
+        if e.retryable:
+            raise
         print(f'No statistics data found for team {team_id} in league {league_id} and season {season_id}.')
         return pd.DataFrame(columns=[
             'Goles convertidos', 'Goles recibidos', 'Asistencias', 'Remates', 'Goles de penal', 'Penales ejecutados',
@@ -1761,252 +4282,152 @@ def get_statistics_from_single_team(team_id, league_id, season_id):
     statistics_df['league_id'] = league_id
     statistics_df['season_id'] = season_id
     
-    statistics_df.to_csv('data/sofascore_team_statistics.csv', index=False, encoding='utf-8')
+    write_table(statistics_df, 'data/sofascore_team_statistics.csv')
 
     return statistics_df
 
 
-def get_lineups_from_single_event(events, delay=5):
+@instrument_driver
+def get_lineups_from_single_event(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Processes a list of events to extract and organize lineup data and average player positions.
 
     Args:
         events (list): List of dictionaries containing event information.
-        delay (int): Time to wait (in seconds) between requests to avoid overloading the server. Default is 5 seconds.
+        delay (int): Extra time to wait (in seconds) between requests, on top of the shared rate limit. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         pd.DataFrame: A DataFrame containing the lineup data and average player positions for all processed events.
     """
-    dfs = []  # Initialize a list to store DataFrames for each event
-
-    for event in events:
-        time.sleep(delay)  # Wait before making the next request
-
-        event_id = event
-        
-        try:
-            data = get_event_data(event_id)
-            status = data['event']['status']['type']
-
-            if status == 'finished':
-                # Get lineup, average positions, and event data
-                lineups = get_lineups(event_id)
-                average_positions = get_average_positions(event_id)
-
-                # Extract and process formations for home and away teams
-                home_formation = lineups['home']['formation']
-                away_formation = lineups['away']['formation']
-
-                # Process home formation
-                home_groups_formation = home_formation.split('-')
-                home_def = int(home_groups_formation[0])
-                home_ata = int(home_groups_formation[-1])
-
-                if len(home_groups_formation) == 4:
-                    home_mid_0 = int(home_groups_formation[1])
-                    home_mid_1 = 0
-                    home_mid_2 = int(home_groups_formation[2])
-                else:
-                    home_mid_0 = 0
-                    home_mid_1 = int(home_groups_formation[1])
-                    home_mid_2 = 0
-
-                # Process away formation
-                away_groups_formation = away_formation.split('-')
-                away_def = int(away_groups_formation[0])
-                away_ata = int(away_groups_formation[-1])
-
-                if len(away_groups_formation) == 4:
-                    away_mid_0 = int(away_groups_formation[1])
-                    away_mid_1 = 0
-                    away_mid_2 = int(away_groups_formation[2])
-                else:
-                    away_mid_0 = 0
-                    away_mid_1 = int(away_groups_formation[1])
-                    away_mid_2 = 0
-
-                # Initialize lists to store player data
-                home = []
-                away = []
-                home_avg = []
-                away_avg = []
-
-                # Process home team players
-                for j in range(len(lineups['home']['players'])):
-                    player = lineups['home']['players'][j]
-                    name = player['player']['name']
-                    id = player['player']['id']
-                    jersey = player['shirtNumber']
-                    position = player.get('position', '')
-                    substitute = player['substitute']
-                    minutes = player.get('statistics', {}).get('minutesPlayed', 0)
-
-                    if j < len(average_positions['home']):
-                        avg_player = average_positions['home'][j]
-                        avg_id = avg_player['player']['id']
-                        averageX = avg_player['averageX']
-                        averageY = avg_player['averageY']
-                        pointsCount = avg_player['pointsCount']
-
-                    order = j + 1
-                    line, lat, pos = determine_position(order, home_def, home_mid_0, home_mid_1, home_mid_2, home_ata, substitute)
-                    
-                    # Append player data to home list
-                    home.append([name, id, jersey, position, substitute, minutes, order, line, lat, pos])
-                    home_avg.append([avg_id, averageX, averageY, pointsCount])
-
-                # Process away team players
-                for k in range(len(lineups['away']['players'])):
-                    player = lineups['away']['players'][k]
-                    name = player['player']['name']
-                    id = player['player']['id']
-                    jersey = player['shirtNumber']
-                    position = player.get('position', '')
-                    substitute = player['substitute']
-                    minutes = player.get('statistics', {}).get('minutesPlayed', 0)
-
-                    if k < len(average_positions['away']):
-                        avg_player = average_positions['away'][k]
-                        avg_id = avg_player['player']['id']
-                        averageX = avg_player['averageX']
-                        averageY = avg_player['averageY']
-                        pointsCount = avg_player['pointsCount']
-
-                    order = k + 1
-                    line, lat, pos = determine_position(order, away_def, away_mid_0, away_mid_1, away_mid_2, away_ata, substitute)
-
-                    # Append player data to away list
-                    away.append([name, id, jersey, position, substitute, minutes, order, line, lat, pos])
-                    away_avg.append([avg_id, averageX, averageY, pointsCount])
-
-                # Create DataFrames for home and away teams
-                home_df = pd.DataFrame(home, columns=['player', 'id', 'jersey', 'position', 'substitute', 'minutes', 'order', 'line', 'lat', 'pos'])
-                home_df['local'] = 'Home'
-                home_df['team'] = data['event']['homeTeam']['shortName']
-                home_df['formation'] = home_formation
-                home_df['defense'] = home_def
-                home_df['midfield'] = home_mid_0 + home_mid_1 + home_mid_2
-                home_df['attack'] = home_ata
-
-                away_df = pd.DataFrame(away, columns=['player', 'id', 'jersey', 'position', 'substitute', 'minutes', 'order', 'line', 'lat', 'pos'])
-                away_df['local'] = 'Away'
-                away_df['team'] = data['event']['awayTeam']['shortName']
-                away_df['formation'] = away_formation
-                away_df['defense'] = away_def
-                away_df['midfield'] = away_mid_0 + away_mid_1 + away_mid_2
-                away_df['attack'] = away_ata
-
-                # Create DataFrame for average player positions
-                home_avg_position = pd.DataFrame(home_avg, columns=['avg_id', 'averageX', 'averageY', 'pointsCount'])
-                away_avg_position = pd.DataFrame(away_avg, columns=['avg_id', 'averageX', 'averageY', 'pointsCount'])
-                df_avg_position = pd.concat([home_avg_position, away_avg_position], ignore_index=True)
-                df_avg_position.rename(columns={'avg_id': 'id'}, inplace=True)
-
-                # Merge lineup data with average position data
-                df = pd.concat([home_df, away_df], ignore_index=True)
-                df_merged = pd.merge(df, df_avg_position, on='id', how='left')
-                df_merged['event_id'] = event_id
-
-                # Append the DataFrame to the list
-                dfs.append(df_merged)
-
-        except Exception as e:
-            print(f"Error in processing lineup for event {event_id}: {e}")
-
-    # Concatenate all DataFrames into one and save to CSV
-    os.makedirs('data', exist_ok=True)
-    lineups_df = pd.concat(dfs, ignore_index=True)
-    lineups_df.to_csv('data/sofascore_lineup.csv', index=False, encoding='utf-8')
-
-    return lineups_df
+    return run_batch(get_event_lineup, events, 'data/sofascore_lineup.csv', 'lineup', delay=delay,
+                     max_workers=max_workers, incremental=incremental, resume=resume)
 
 
-def get_results_from_single_event(events, delay=5):
+@instrument_driver
+def get_results_from_single_event(events, delay=0, max_workers=4, incremental=False, resume=True):
     """
     Extracts match results from a list of events and returns a DataFrame.
 
     Args:
         events (list): A list of event dictionaries, each containing an 'id'.
-        delay (int, optional): Delay in seconds between requests. Default is 5 seconds.
+        delay (int, optional): Extra delay in seconds between requests. Default is 0 seconds.
+        max_workers (int): Maximum number of events fetched at the same time. Default is 4.
+        incremental (bool): If True, only the finished events missing from the previous output, or saved there before they finished, are fetched and merged into it. Default is False.
+        resume (bool): If True, the events saved in the checkpoint of an interrupted run are not fetched again. Default is True.
 
     Returns:
         pd.DataFrame: A DataFrame containing match results for each event.
     """
-    # List to store DataFrames for each event
-    dfs = []
-
-    for event in events:
-        # Respect the delay between requests to avoid overloading the server
-        time.sleep(delay)
-
-        # Extract the event ID from the event dictionary
-        event_id = event
-
-        # Fetch event data using the event ID
-        event_data = get_event_data(event_id)
-        status = event_data['event']['status']['type']
-
-        if status == 'finished':
-            # Extract necessary details from the event data
-            homeTeam_name = event_data['event']['homeTeam']['shortName']
-            homeTeam_id = event_data['event']['homeTeam']['id']
-            homeScore = int(event_data['event']['homeScore']['display'])
-            awayTeam_name = event_data['event']['awayTeam']['shortName']
-            awayTeam_id = event_data['event']['awayTeam']['id']
-            awayScore = int(event_data['event']['awayScore']['display'])
-
-            # Create a dictionary for the home team
-            home_dic = {
-                'event_id': event_id,
-                'team': homeTeam_name,
-                'team_id': homeTeam_id,
-                'score_for': homeScore,
-                'score_against': awayScore,
-                'win': homeScore > awayScore,
-                'draw': homeScore == awayScore,
-                'loose': homeScore < awayScore,
-                'local': 'Home'
-            }
-
-            # Create a dictionary for the away team
-            away_dic = {
-                'event_id': event_id,
-                'team': awayTeam_name,
-                'team_id': awayTeam_id,
-                'score_for': awayScore,
-                'score_against': homeScore,
-                'win': awayScore > homeScore,
-                'draw': awayScore == homeScore,
-                'loose': awayScore < homeScore,
-                'local': 'Away'
-            }
+    return run_batch(get_event_result, events, 'data/sofascore_results.csv', 'result', delay=delay,
+                     max_workers=max_workers, incremental=incremental, resume=resume)
 
-            # Convert the dictionaries into DataFrames
-            home_df = pd.DataFrame([home_dic])
-            away_df = pd.DataFrame([away_dic])
 
-            # Concatenate the home and away DataFrames into a single DataFrame
-            df = pd.concat([home_df, away_df], ignore_index=True)
+def get_event_result(event_id):
+    """
+    Extracts the result of a finished event for each of its teams.
 
-            # Append the DataFrame to the list
-            dfs.append(df)
+    Args:
+        event_id (int): The unique identifier for the event.
 
-    # Concatenate all the DataFrames into one final DataFrame
-    results_df = pd.concat(dfs, ignore_index=True)
+    Returns:
+        list of dict: One record for the home team and one for the away team, or None if the event is not finished.
+    """
+    # Fetch event data using the event ID
+    event_data = get_event_data(event_id)
+    status = event_data['event']['status']['type']
 
-    # Export the final DataFrame to a CSV file
-    os.makedirs('data', exist_ok=True)
-    results_df.to_csv('data/sofascore_results.csv', index=False, encoding='utf-8')
+    if status != 'finished':
+        return None
 
-    return results_df
+    # Extract necessary details from the event data
+    homeTeam_name = event_data['event']['homeTeam']['shortName']
+    homeTeam_id = event_data['event']['homeTeam']['id']
+    homeScore = int(event_data['event']['homeScore']['display'])
+    awayTeam_name = event_data['event']['awayTeam']['shortName']
+    awayTeam_id = event_data['event']['awayTeam']['id']
+    awayScore = int(event_data['event']['awayScore']['display'])
+
+    # Record for the home team
+    home_dic = {
+        'event_id': event_id,
+        'team': homeTeam_name,
+        'team_id': homeTeam_id,
+        'score_for': homeScore,
+        'score_against': awayScore,
+        'win': homeScore > awayScore,
+        'draw': homeScore == awayScore,
+        'loose': homeScore < awayScore,
+        'local': 'Home'
+    }
 
+    # Record for the away team
+    away_dic = {
+        'event_id': event_id,
+        'team': awayTeam_name,
+        'team_id': awayTeam_id,
+        'score_for': awayScore,
+        'score_against': homeScore,
+        'win': awayScore > homeScore,
+        'draw': awayScore == homeScore,
+        'loose': awayScore < homeScore,
+        'local': 'Away'
+    }
 
-def get_shotmap(event_id):
+    return [home_dic, away_dic]
+
+
+SHOTMAP_FIELDS = {
+    # Output column: key path in each shot of the shotmap response
+    'player': ('player', 'id'),
+    'player_shortName': ('player', 'shortName'),
+    'isHome': ('isHome',),
+    'shotType': ('shotType',),
+    'situation': ('situation',),
+    'bodyPart': ('bodyPart',),
+    'goalMouthLocation': ('goalMouthLocation',),
+    'xg': ('xg',),
+    'xgot': ('xgot',),
+    'id': ('id',),
+    'time': ('time',),
+    'addedTime': ('addedTime',),
+    'timeSeconds': ('timeSeconds',),
+    'reversedPeriodTime': ('reversedPeriodTime',),
+    'reversedPeriodTimeSeconds': ('reversedPeriodTimeSeconds',),
+    'incidentType': ('incidentType',),
+    'goalType': ('goalType',),
+    'x': ('playerCoordinates', 'x'),
+    'y': ('playerCoordinates', 'y'),
+    'z': ('playerCoordinates', 'z'),
+    'x_goal': ('draw', 'goal', 'x'),
+    'y_goal': ('draw', 'goal', 'y'),
+    'goalMouth_x': ('goalMouthCoordinates', 'x'),
+    'goalMouth_y': ('goalMouthCoordinates', 'y'),
+    'goalMouth_z': ('goalMouthCoordinates', 'z'),
+    'block_x': ('blockCoordinates', 'x'),
+    'block_y': ('blockCoordinates', 'y'),
+    'block_z': ('blockCoordinates', 'z'),
+}
+
+SHOTMAP_DTYPES = {
+    'player': 'Int64', 'id': 'Int64', 'time': 'Int64', 'addedTime': 'Int64', 'timeSeconds': 'Int64',
+    'reversedPeriodTime': 'Int64', 'reversedPeriodTimeSeconds': 'Int64', 'xg': 'float64', 'xgot': 'float64',
+    'x': 'float64', 'y': 'float64', 'z': 'float64', 'x_goal': 'float64', 'y_goal': 'float64',
+    'goalMouth_x': 'float64', 'goalMouth_y': 'float64', 'goalMouth_z': 'float64',
+    'block_x': 'float64', 'block_y': 'float64', 'block_z': 'float64',
+}
+
+
+def get_shotmap(event_id, data=None, event_data=None):
     """
     Fetches shotmap data for a specific event, transforming it into a DataFrame with relevant columns.
     
     Args:
         event_id (str): Unique identifier for the event.
+        data (dict, optional): Response already fetched, e.g. by AsyncClient. Fetched here by default.
+        event_data (dict, optional): Event header already fetched. Taken from the event repository by default.
 
     Returns:
         DataFrame: Processed shotmap data with player and shot coordinates, goal coordinates, and home/away team IDs.
@@ -2014,36 +4435,67 @@ def get_shotmap(event_id):
     
     # API endpoint for shotmap data
     api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/shotmap'
-    data = request_to_json(api_url)
+    if data is None:
+        data = request_to_json(api_url)
 
-    # API endpoint for event team details
-    teams_api_url = f'https://www.sofascore.com/api/v1/event/{event_id}'
-    teams_data = request_to_json(teams_api_url)
+    # Event team details, shared with the other functions through the event repository
+    teams_data = get_event_data(event_id) if event_data is None else event_data
 
     # Get home and away team IDs
     home = teams_data['event']['homeTeam']['id']
     away = teams_data['event']['awayTeam']['id']
 
-    # Create DataFrame from shotmap data
-    shotmap_df = pd.DataFrame(data['shotmap'])
+    # Flatten the nested shot data into scalar columns
+    shotmap_df = normalize_records(data['shotmap'], SHOTMAP_FIELDS, SHOTMAP_DTYPES)
     shotmap_df['event_id'] = int(event_id)
 
-    # Extract player ID and coordinates
-    shotmap_df['player'] = shotmap_df['player'].apply(lambda x: x['id'] if isinstance(x, dict) else None)
-    shotmap_df['x'] = shotmap_df['playerCoordinates'].apply(lambda x: x['x'] if isinstance(x, dict) else None)
-    shotmap_df['y'] = shotmap_df['playerCoordinates'].apply(lambda x: x['y'] if isinstance(x, dict) else None)
-    
-    # Extract goal coordinates
-    shotmap_df['x_goal'] = shotmap_df['draw'].apply(lambda x: x['goal']['x'] if isinstance(x, dict) else None)
-    shotmap_df['y_goal'] = shotmap_df['draw'].apply(lambda x: x['goal']['y'] if isinstance(x, dict) else None)
-    
     # Map team ID based on whether it's a home or away shot
-    shotmap_df['team'] = shotmap_df['isHome'].apply(lambda x: home if x else away)
-    shotmap_df['isHome'] = shotmap_df['isHome'].apply(lambda x: 'home' if x else 'away')
+    is_home = shotmap_df['isHome'].eq(True)
+    shotmap_df['team'] = is_home.map({True: home, False: away})
+    shotmap_df['isHome'] = is_home.map({True: 'home', False: 'away'})
 
     return shotmap_df
 
 
+def get_season_rounds(league_id, season_id):
+    """
+    Lists the rounds of a league season.
+
+    Args:
+        league_id (int): Unique identifier of the league (unique tournament).
+        season_id (int): Unique identifier of the season.
+
+    Returns:
+        list of dict: Rounds with their 'round' number and, for knockout rounds, their 'slug'.
+    """
+    api_url = f'https://www.sofascore.com/api/v1/unique-tournament/{league_id}/season/{season_id}/rounds'
+    data = request_to_json(api_url)
+
+    return data['rounds']
+
+
+def get_round_events(league_id, season_id, round_number, slug=None):
+    """
+    Fetches the events of one round of a league season.
+
+    Args:
+        league_id (int): Unique identifier of the league (unique tournament).
+        season_id (int): Unique identifier of the season.
+        round_number (int): Number of the round.
+        slug (str, optional): Slug of the round, needed for knockout rounds, e.g. 'quarterfinals'.
+
+    Returns:
+        list of dict: The events of the round as returned by the API.
+    """
+    api_url = f'https://www.sofascore.com/api/v1/unique-tournament/{league_id}/season/{season_id}/events/round/{round_number}'
+    if slug:
+        api_url += f'/slug/{slug}'
+    data = request_to_json(api_url)
+
+    return data['events']
+
+
+@instrument_driver
 def get_event_from_season(tournament_id, season_id):
     """
     Fetches unique event IDs from a given tournament and season.
@@ -2072,6 +4524,23 @@ def get_event_from_season(tournament_id, season_id):
     return events
 
 
+# Mapping of positions to full names
+POSITION_NAMES = {
+    'ST': 'Delantero',
+    'LW': 'Extremo izquierdo',
+    'RW': 'Extremo derecho',
+    'AM': 'Mediocampista ofensivo',
+    'ML': 'Mediocampista izquierdo',
+    'MC': 'Mediocampista central',
+    'MR': 'Mediocampista derecho',
+    'DM': 'Defensa mediocampo',
+    'DL': 'Defensor izquierdo',
+    'DC': 'Defensor central',
+    'DR': 'Defensor derecho',
+    'GK': 'Portero',
+}
+
+
 def get_player_profile(player_url):
     """
     Scrapes player profile data from the given Sofascore URL.
@@ -2082,36 +4551,20 @@ def get_player_profile(player_url):
     Returns:
         dict: A dictionary containing the player's profile data.
     """
-    import requests
-    from bs4 import BeautifulSoup
-    import re
-
-    # Mapping of positions to full names
-    position_map = {
-        'ST': 'Delantero',
-        'LW': 'Extremo izquierdo',
-        'RW': 'Extremo derecho',
-        'AM': 'Mediocampista ofensivo',
-        'ML': 'Mediocampista izquierdo',
-        'MC': 'Mediocampista central',
-        'MR': 'Mediocampista derecho',
-        'DM': 'Defensa mediocampo',
-        'DL': 'Defensor izquierdo',
-        'DC': 'Defensor central',
-        'DR': 'Defensor derecho',
-        'GK': 'Portero',
-    }
-
     # Perform the HTTP request
+    get_rate_limiter().acquire()
     response = requests.get(player_url)
     response.raise_for_status()  # Check if the request was successful
 
     # Parse the HTML
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = parse_html(response.text)
 
-    # Helper function to extract text from a selector
+    # Helper function to extract text from a selector, running each selector only once
+    selected = {}
     def extract_text(selector, index=None):
-        elements = soup.select(selector)
+        if selector not in selected:
+            selected[selector] = soup.select(selector)
+        elements = selected[selector]
         if index is not None:
             return elements[index].text.strip() if len(elements) > index else None
         return elements[0].text.strip() if elements else None
@@ -2121,14 +4574,11 @@ def get_player_profile(player_url):
     player_id = player_id.group(1) if player_id else None
 
     # Extract positions based on <text> tags containing abbreviations
-    positions_found = [
-        element.text.strip()
-        for element in soup.find_all('text')
-        if element.text.strip() in position_map
-    ]
+    texts = (element.text.strip() for element in soup.find_all('text'))
+    positions_found = [text for text in texts if text in POSITION_NAMES]
 
     # Translate positions to full names
-    translated_positions = [position_map[pos] for pos in positions_found]
+    translated_positions = [POSITION_NAMES[pos] for pos in positions_found]
 
     # Build the player profile dictionary
     player_profile = {
@@ -2149,12 +4599,35 @@ def get_player_profile(player_url):
     return player_profile
 
 
-def get_incidents(event_id):
+INCIDENTS_FIELDS = {
+    # Output column: key path in each incident of the incidents response
+    'time': ('time',),
+    'incidentType': ('incidentType',),
+    'incidentClass': ('incidentClass',),
+    'isHome': ('isHome',),
+    'player_id': ('player', 'id'),
+    'player_shortName': ('player', 'shortName'),
+    'player_jerseyNumber': ('player', 'jerseyNumber'),
+    'playerIn_id': ('playerIn', 'id'),
+    'playerIn_shortName': ('playerIn', 'shortName'),
+    'playerIn_jerseyNumber': ('playerIn', 'jerseyNumber'),
+    'playerOut_id': ('playerOut', 'id'),
+    'playerOut_shortName': ('playerOut', 'shortName'),
+    'playerOut_jerseyNumber': ('playerOut', 'jerseyNumber'),
+}
+
+INCIDENTS_DTYPES = {
+    'time': 'Int64', 'player_id': 'Int64', 'playerIn_id': 'Int64', 'playerOut_id': 'Int64',
+}
+
+
+def get_incidents(event_id, data=None):
     """
     Fetches incidents data for a specified event from Sofascore's API.
 
     Args:
         event_id (int): Unique identifier for the event.
+        data (dict, optional): Response already fetched, e.g. by AsyncClient. Fetched here by default.
 
     Returns:
         pd.DataFrame: DataFrame containing incidents data points for the event.
@@ -2163,36 +4636,15 @@ def get_incidents(event_id):
     api_url = f'https://www.sofascore.com/api/v1/event/{event_id}/incidents'
     
     # Make the request and get the response in JSON format
-    data = request_to_json(api_url)
+    if data is None:
+        data = request_to_json(api_url)
+
+    # Flatten the incidents and the players involved into scalar columns
+    incidents_df = normalize_records(data['incidents'], INCIDENTS_FIELDS, INCIDENTS_DTYPES)
 
-    # Convert the incidents data into a DataFrame
-    df = pd.DataFrame(data['incidents'])
-    
-    # Create a new DataFrame to store the processed incidents
-    incidents_df = pd.DataFrame()
-    
-    # Process the incidents information
-    incidents_df['time'] = df['time']
-    incidents_df['incidentType'] = df['incidentType']
-    incidents_df['incidentClass'] = df['incidentClass']
-    
     # Convert 'isHome' to 'home' or 'away'
-    incidents_df['isHome'] = df['isHome'].apply(lambda x: 'home' if x else 'away')
-
-    # Process player data for incidents
-    incidents_df['player_id'] = df['player'].apply(lambda x: x.get('id') if isinstance(x, dict) else None)
-    incidents_df['player_shortName'] = df['player'].apply(lambda x: x.get('shortName') if isinstance(x, dict) else None)
-    incidents_df['player_jerseyNumber'] = df['player'].apply(lambda x: x.get('jerseyNumber') if isinstance(x, dict) else None)
-
-    # Process playerIn data (players who entered the field)
-    incidents_df['playerIn_id'] = df['playerIn'].apply(lambda x: x.get('id') if isinstance(x, dict) else None)
-    incidents_df['playerIn_shortName'] = df['playerIn'].apply(lambda x: x.get('shortName') if isinstance(x, dict) else None)
-    incidents_df['playerIn_jerseyNumber'] = df['playerIn'].apply(lambda x: x.get('jerseyNumber') if isinstance(x, dict) else None)
-
-    # Process playerOut data (players who left the field)
-    incidents_df['playerOut_id'] = df['playerOut'].apply(lambda x: x.get('id') if isinstance(x, dict) else None)
-    incidents_df['playerOut_shortName'] = df['playerOut'].apply(lambda x: x.get('shortName') if isinstance(x, dict) else None)
-    incidents_df['playerOut_jerseyNumber'] = df['playerOut'].apply(lambda x: x.get('jerseyNumber') if isinstance(x, dict) else None)
+    incidents_df['isHome'] = incidents_df['isHome'].eq(True).map({True: 'home', False: 'away'})
+    incidents_df['event_id'] = int(event_id)
 
     # Return the processed incidents DataFrame
     return incidents_df
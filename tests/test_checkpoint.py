@@ -0,0 +1,34 @@
+import pandas as pd
+
+import pvd_Sofascore as sofascore
+
+
+def test_batches_with_different_columns_resume(tmp_path):
+    path = str(tmp_path / 'statistics.csv')
+
+    checkpoint = sofascore.Checkpoint(path, key='player_id', every=1, scope='run')
+    checkpoint.add([{'player_id': 1, 'goals': 3, 'rating': 7.1}])
+    # A goalkeeper brings new columns, then a player has the columns in another order
+    checkpoint.add([{'player_id': 2, 'goals': 0, 'cleanSheet': 5, 'goalsConceded': 9, 'rating': 6.8}])
+    checkpoint.add([{'rating': 6.5, 'goals': 1, 'player_id': 3}])
+
+    resumed = sofascore.Checkpoint(path, key='player_id', scope='run')
+    assert resumed.load() == {'1', '2', '3'}
+
+    rows = pd.concat(resumed.frames).set_index('player_id')
+    assert rows.loc[1, 'goals'] == 3 and rows.loc[1, 'rating'] == 7.1
+    assert rows.loc[2, 'cleanSheet'] == 5 and rows.loc[2, 'goalsConceded'] == 9
+    assert rows.loc[3, 'goals'] == 1 and rows.loc[3, 'rating'] == 6.5
+    assert pd.isna(rows.loc[3, 'cleanSheet'])
+
+
+def test_unreadable_checkpoint_is_discarded(tmp_path):
+    path = str(tmp_path / 'statistics.csv')
+    checkpoint = sofascore.Checkpoint(path, key='player_id', scope='run')
+    with open(checkpoint.scope_path, 'w', encoding='utf-8') as f:
+        f.write('run')
+    with open(checkpoint.path, 'w', encoding='utf-8') as f:
+        f.write('player_id,goals\n1,3\n2,0,5,9\n')
+
+    assert checkpoint.load() == set()
+    assert not (tmp_path / 'statistics.csv.partial').exists()
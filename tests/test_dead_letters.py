@@ -0,0 +1,32 @@
+import http.client
+
+import pvd_Sofascore as sofascore
+
+
+def test_only_transient_errors_are_dead_lettered(tmp_path):
+    errors = {
+        1: KeyError('highlights'),  # Parse error, the response will not change
+        2: IndexError('list index out of range'),
+        3: sofascore.SofascoreRequestError('Not found', 'url', 404, retryable=False),
+        4: sofascore.SofascoreRequestError('Service unavailable', 'url', 503),
+        5: ConnectionResetError(),
+        6: http.client.RemoteDisconnected(),
+    }
+
+    def fetch(item):
+        if item in errors:
+            raise errors[item]
+        return [{'item_id': item}]
+
+    df = sofascore.run_batch(fetch, list(range(1, 8)), str(tmp_path / 'out.csv'), 'dead letters test',
+                             key='item_id', resume=False)
+
+    assert df['item_id'].tolist() == [7]
+    assert sofascore.get_failed_items('dead letters test') == [4, 5, 6]
+
+
+def test_is_retryable():
+    assert not sofascore.is_retryable(KeyError('event'))
+    assert not sofascore.is_retryable(sofascore.SofascoreRequestError('Not found', 'url', 404, retryable=False))
+    assert sofascore.is_retryable(sofascore.SofascoreRequestError('Too many requests', 'url', 429))
+    assert sofascore.is_retryable(TimeoutError())
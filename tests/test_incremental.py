@@ -0,0 +1,32 @@
+import pvd_Sofascore as sofascore
+
+
+def test_finished_events_without_data_are_not_fetched_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    status = {1: 'finished', 2: 'finished', 3: 'finished', 4: 'inprogress'}
+    monkeypatch.setattr(sofascore, 'get_event_status', lambda event_id: status[int(event_id)])
+
+    fetched = []
+
+    def fetch(event_id):
+        fetched.append(event_id)
+        if event_id == 2:
+            raise sofascore.SofascoreRequestError('Not found', 'url', 404, retryable=False)
+        return [{'event_id': event_id, 'value': 1}] if event_id == 1 else None
+
+    path = 'data/highlights.csv'
+    sofascore.run_batch(fetch, [1, 2, 3, 4], path, 'incremental test', incremental=True)
+    assert fetched == [1, 2, 3]
+
+    # Only the event that was still being played is fetched once it finishes
+    fetched.clear()
+    status[4] = 'finished'
+    df = sofascore.run_batch(fetch, [1, 2, 3, 4], path, 'incremental test', incremental=True)
+    assert fetched == [4]
+    assert df['event_id'].tolist() == [1]
+
+
+def test_full_run_adds_no_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = sofascore.run_batch(lambda event_id: [{'event_id': event_id, 'value': 1}], [1, 2], 'data/momentum.csv', 'full test')
+    assert list(df.columns) == ['event_id', 'value']
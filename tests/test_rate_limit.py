@@ -0,0 +1,11 @@
+import pvd_Sofascore as sofascore
+
+
+def test_set_rate_limit_keeps_the_burst():
+    previous = sofascore.get_rate_limiter()
+    try:
+        assert sofascore.set_rate_limit(2).burst == previous.burst == 3
+        assert sofascore.set_rate_limit(2, burst=5).burst == 5
+        assert sofascore.set_rate_limit(1).burst == 5
+    finally:
+        sofascore.set_rate_limit(previous.rate, previous.burst)